@@ -1,19 +1,29 @@
 from flask import Flask
 from flask_cors import CORS
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
 import os
+import logging
 
 load_dotenv()
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
 # Trigger deployment update
 
+from services.json_provider import OrjsonProvider
+from services import compression
+
 app = Flask(__name__)
+# jsonify()/get_json() through orjson when installed (stdlib fallback), NumPy/pandas values included
+app.json = OrjsonProvider(app)
 CORS(app)
+# gzip/brotli for JSON/msgpack/Arrow bodies >= compression.MIN_SIZE
+compression.init_app(app)
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'hiei.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(basedir, 'hiei.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_secret')
 
-from models import db
+from models import db, upgrade_schema, backfill_latest_financials
 db.init_app(app)
 
 from routes.auth_routes import auth_bp
@@ -26,16 +36,24 @@ app.register_blueprint(data_bp, url_prefix='/api/data')
 
 # Ensure DB tables exist (Required for Render/Gunicorn)
 # Render Ephemeral Disk: SQLite will reset on deploy, but need to ensure path exists.
-db_file_path = os.path.join(basedir, 'hiei.db')
-print(f"Database Path: {db_file_path}")
+# Backend and database only: a URI from the environment may carry credentials
+db_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+print(f"Database: {db_url.drivername} {db_url.database}")
 
 with app.app_context():
     try:
         db.create_all()
+        upgrade_schema()
         print("Database tables created successfully.")
     except Exception as e:
         print(f"Error creating database tables: {e}")
 
+@app.cli.command('backfill-latest-financials')
+def backfill_latest_financials_command():
+    """Recompute every user's latest financials pointer from their history."""
+    count = backfill_latest_financials()
+    print(f"Backfilled latest financials for {count} users.")
+
 @app.route('/')
 def home():
     return {"message": "HIEI Backend Running"}
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text, bindparam
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -12,9 +13,12 @@ class User(db.Model):
     password_hash = db.Column(db.String(120), nullable=False)
     address = db.Column(db.String(200), nullable=True)
     household_group = db.Column(db.String(50), nullable=True) # Added for persistence
+    # Most recent UserFinancials row, kept current by save_spending (see backfill_latest_financials)
+    latest_financials_id = db.Column(db.Integer, db.ForeignKey('user_financials.id', use_alter=True), nullable=True)
     
     # Relationship to spending
-    financials = db.relationship('UserFinancials', backref='user', lazy=True)
+    financials = db.relationship('UserFinancials', backref='user', lazy=True, foreign_keys='UserFinancials.user_id')
+    latest_financials = db.relationship('UserFinancials', foreign_keys=[latest_financials_id], post_update=True)
 
 # Policy Maker Model
 class PolicyMaker(db.Model):
@@ -28,6 +32,11 @@ class PolicyMaker(db.Model):
 # User Financials Model (Replaces Spending)
 class UserFinancials(db.Model):
     __tablename__ = 'user_financials'
+    __table_args__ = (
+        # A user's submissions newest-first (history pages, latest-pointer backfill);
+        # SQLite appends the rowid, so (created_at, id) keyset order is covered too
+        db.Index('ix_user_financials_user_created', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
@@ -43,6 +52,8 @@ class UserFinancials(db.Model):
     future_total_spend = db.Column(db.Float, nullable=False, default=0.0) # Predicted total
     salary_status = db.Column(db.String(20), default="SURPLUS") # SURPLUS / DEFICIT
     most_affected_category = db.Column(db.String(50), default="Stable")
+    # JSON list of {months, future_total_spend, savings, salary_status} for every calculator horizon
+    horizon_curve = db.Column(db.Text, nullable=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -59,3 +70,66 @@ class CallbackRequest(db.Model):
     insurer_name = db.Column(db.String(100), nullable=True) # or policy type
     status = db.Column(db.String(20), default='Pending') # Pending, Contacted
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- Schema Upgrades ---
+# db.create_all() only creates missing tables. Columns added to existing models since
+# are listed here and added in place, so older hiei.db files keep working; indexes
+# declared on the models are created if missing.
+ADDED_COLUMNS = {
+    'user_financials': {
+        'horizon_curve': 'TEXT'
+    },
+    'users': {
+        'latest_financials_id': 'INTEGER REFERENCES user_financials(id)'
+    }
+}
+
+def upgrade_schema():
+    inspector = inspect(db.engine)
+    added = set()
+    with db.engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {c['name'] for c in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    added.add(name)
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    if 'latest_financials_id' in added:
+        backfill_latest_financials()
+
+def backfill_latest_financials():
+    # Points every user at their newest submission (ties on created_at go to the later insert).
+    # Set-based (one window pass over the history, no per-user lookup); safe to re-run.
+    # Returns the number of users with a submission.
+    with db.engine.begin() as conn:
+        conn.execute(text("UPDATE users SET latest_financials_id = NULL"))
+        conn.execute(text("""
+            UPDATE users SET latest_financials_id = latest.id
+            FROM (
+                SELECT id, user_id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id ORDER BY created_at DESC, id DESC
+                ) AS rn
+                FROM user_financials
+            ) AS latest
+            WHERE latest.user_id = users.id AND latest.rn = 1
+        """))
+        return conn.execute(text("SELECT COUNT(*) FROM users WHERE latest_financials_id IS NOT NULL")).scalar()
+
+def refresh_latest_financials(user_ids):
+    # Re-points just these users at their newest submission, inside the caller's
+    # session transaction (bulk inserts that bypass save_spending). Uses the
+    # (user_id, created_at) index, one lookup per user.
+    if not user_ids:
+        return
+    db.session.execute(text("""
+        UPDATE users SET latest_financials_id = (
+            SELECT f.id FROM user_financials f
+            WHERE f.user_id = users.id
+            ORDER BY f.created_at DESC, f.id DESC
+            LIMIT 1
+        )
+        WHERE id IN :ids
+    """).bindparams(bindparam('ids', expanding=True)), {"ids": sorted(user_ids)})
@@ -1,9 +1,101 @@
 from flask import Blueprint, jsonify, request
 from models import db, User, PolicyMaker, UserFinancials, CallbackRequest
+from sqlalchemy import and_, or_, case, func, null
 from datetime import datetime
+import json
+
+from services.http_cache import etag_from
 
 data_bp = Blueprint('data', __name__)
 
+MAX_PAGE_SIZE = 5000
+# Response field -> column for the list endpoints (sparse selection via ?fields=)
+INSIGHT_USER_FIELDS = {
+    "username": User.username,
+    "phone": User.phone,
+    "household_group": User.household_group
+}
+INSIGHT_FINANCIAL_FIELDS = {
+    "salary": UserFinancials.salary,
+    "total_spend": UserFinancials.total_spend,
+    "future_total_spend": UserFinancials.future_total_spend,
+    "salary_status": UserFinancials.salary_status,
+    "most_affected_category": UserFinancials.most_affected_category
+}
+HISTORY_FIELDS = {
+    "date": UserFinancials.created_at,
+    "salary": UserFinancials.salary,
+    "total_spend": UserFinancials.total_spend,
+    "future_total_spend": UserFinancials.future_total_spend,
+    "salary_status": UserFinancials.salary_status,
+    "most_affected": UserFinancials.most_affected_category,
+    "horizon_curve": UserFinancials.horizon_curve
+}
+
+# Policy severity of a household's latest projection (same thresholds the dashboard explains):
+# Critical = projected spend exceeds income, Watchlist = above 90% of income, else Stable.
+# NULL for a user without a submission (outer joins), so ?severity= never matches them.
+SEVERITY_LEVELS = {"Critical": 3, "Watchlist": 2, "Stable": 1}
+SEVERITY = case(
+    (UserFinancials.id.is_(None), null()),
+    (UserFinancials.future_total_spend > UserFinancials.salary, 3),
+    (UserFinancials.future_total_spend > UserFinancials.salary * 0.9, 2),
+    else_=1
+)
+
+def _list_arg(name):
+    # ?name=a,b or repeated ?name=a&name=b
+    values = []
+    for v in request.args.getlist(name):
+        values.extend(x.strip() for x in v.split(',') if x.strip())
+    return values
+
+def _page_args():
+    # Keyset pagination: ?after=<last id of the previous page>&limit=<n>. No limit = everything.
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return after, limit
+
+def _select_fields(available):
+    # Requested subset of `available` (all of it when ?fields= is absent)
+    fields = _list_arg('fields')
+    if not fields:
+        return list(available)
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [f for f in available if f in fields]
+
+def _page_response(result, limit, last_id):
+    # The body stays a plain list; the cursor for the next page travels in X-Next-Cursor
+    response = jsonify(result)
+    if limit is not None and len(result) == limit:
+        response.headers['X-Next-Cursor'] = str(last_id)
+    return response
+
+# --- Cache validators (ETag) ---
+# Rows are only ever appended, so (count, max id) moves whenever a listing can change.
+# No Last-Modified here: bulk imports may backdate created_at, and users/policy makers
+# carry no timestamps, so no column tells when a listing last changed.
+def _policy_makers_version():
+    return tuple(db.session.query(func.count(PolicyMaker.id), func.max(PolicyMaker.id)).one()), None
+
+def _history_version(user_id):
+    version = db.session.query(
+        func.count(UserFinancials.id), func.max(UserFinancials.id)
+    ).filter(UserFinancials.user_id == user_id).one()
+    return tuple(version), None
+
+def _insights_version():
+    # A new submission always becomes its user's latest with the highest id, so
+    # max(latest_financials_id) moves on every save; users only grow
+    version = db.session.query(
+        func.count(User.id), func.max(User.id), func.max(User.latest_financials_id)
+    ).one()
+    return tuple(version), None
+
 # --- User: Save Calculator Results ---
 @data_bp.route('/spending', methods=['POST'])
 def save_spending():
@@ -19,16 +111,40 @@ def save_spending():
             total_spend=data.get('total_spend', 0),
             future_total_spend=data.get('future_total_spend', 0),
             salary_status=data.get('salary_status', 'Unknown'),
-            most_affected_category=data.get('most_affected_category', 'Stable')
+            most_affected_category=data.get('most_affected_category', 'Stable'),
+            horizon_curve=json.dumps(data['horizon_curve']) if data.get('horizon_curve') else None
         )
         db.session.add(new_record)
+        db.session.flush()
+        # Same transaction: the user's latest pointer never lags the history
+        User.query.filter_by(id=new_record.user_id).update({"latest_financials_id": new_record.id})
         db.session.commit()
         return jsonify({"message": "Financial data saved successfully"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# --- Field teams: Bulk import of survey budgets ---
+@data_bp.route('/spending/bulk', methods=['POST'])
+def save_spending_bulk():
+    # Body: NDJSON (one /spending record per line) or CSV with the same column names,
+    # chosen by Content-Type (application/x-ndjson, text/csv) or ?format=ndjson|csv.
+    # Optional "date" per row backdates the submission. The body is streamed, validated
+    # row by row and inserted in chunks; bad rows are reported, not fatal.
+    from services.ingest import read_records, ingest_spending
+
+    fmt = request.args.get('format')
+    if not fmt:
+        mimetype = request.mimetype or ''
+        fmt = 'csv' if mimetype in ('text/csv', 'application/csv') else 'ndjson' if 'ndjson' in mimetype or 'jsonl' in mimetype else None
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({"error": "Send application/x-ndjson or text/csv (or ?format=ndjson|csv)"}), 415
+
+    summary = ingest_spending(read_records(request.stream, fmt))
+    return jsonify(summary), 201 if summary["inserted"] else 400
+
 # --- User: View available policy makers ---
 @data_bp.route('/policy-makers', methods=['GET'])
+@etag_from(_policy_makers_version)
 def get_policy_makers():
     pms = PolicyMaker.query.all()
     result = [{
@@ -40,17 +156,44 @@ def get_policy_makers():
 
 # --- User: Get own history ---
 @data_bp.route('/history/<int:user_id>', methods=['GET'])
+@etag_from(_history_version)
 def get_user_history(user_id):
-    history = UserFinancials.query.filter_by(user_id=user_id).order_by(UserFinancials.created_at.desc()).all()
-    result = [{
-        "date": r.created_at.strftime("%Y-%m-%d"),
-        "salary": r.salary,
-        "total_spend": r.total_spend,
-        "future_total_spend": r.future_total_spend,
-        "salary_status": r.salary_status,
-        "most_affected": r.most_affected_category
-    } for r in history]
-    return jsonify(result)
+    # Newest first. ?after=<id>&limit=, ?status=, ?most_affected_category=, ?fields=
+    try:
+        after, limit = _page_args()
+        fields = _select_fields(HISTORY_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = db.session.query(UserFinancials.id, *[HISTORY_FIELDS[f] for f in fields]).filter(UserFinancials.user_id == user_id)
+    if after is not None:
+        # Rows strictly older than the cursor row in (created_at, id) order
+        cursor = db.session.query(UserFinancials.created_at).filter_by(id=after, user_id=user_id).scalar()
+        if cursor is None:
+            return jsonify({"error": "Unknown cursor"}), 400
+        query = query.filter(or_(UserFinancials.created_at < cursor,
+                                 and_(UserFinancials.created_at == cursor, UserFinancials.id < after)))
+    statuses = _list_arg('status')
+    if statuses:
+        query = query.filter(UserFinancials.salary_status.in_(statuses))
+    affected = _list_arg('most_affected_category')
+    if affected:
+        query = query.filter(UserFinancials.most_affected_category.in_(affected))
+    query = query.order_by(UserFinancials.created_at.desc(), UserFinancials.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = []
+    for r in query.all():
+        row = {"id": r.id}
+        for f in fields:
+            row[f] = getattr(r, HISTORY_FIELDS[f].key)
+        if 'date' in row:
+            row['date'] = row['date'].strftime("%Y-%m-%d")
+        if row.get('horizon_curve'):
+            row['horizon_curve'] = json.loads(row['horizon_curve'])
+        result.append(row)
+    return _page_response(result, limit, result[-1]["id"] if result else None)
 
 # --- Callback Request ---
 @data_bp.route('/callback', methods=['POST'])
@@ -69,35 +212,123 @@ def save_callback():
 
 # --- Policy Maker: Get all users and their latest stats ---
 @data_bp.route('/users-insights', methods=['GET'])
+@etag_from(_insights_version)
 def get_users_insights():
+    # Ordered by user id. ?after=<id>&limit=, filters ?status=, ?household_group=,
+    # ?most_affected_category=, ?severity= (comma-separated; a financial filter drops users
+    # without a submission), ?fields= any of the user fields, the financial fields or "financials"
+    try:
+        after, limit = _page_args()
+        fields = _select_fields(list(INSIGHT_USER_FIELDS) + list(INSIGHT_FINANCIAL_FIELDS) + ["financials"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
-        users = User.query.all()
+        user_fields = [f for f in INSIGHT_USER_FIELDS if f in fields]
+        if not _list_arg('fields') or "financials" in fields:
+            fin_fields = list(INSIGHT_FINANCIAL_FIELDS)
+        else:
+            fin_fields = [f for f in INSIGHT_FINANCIAL_FIELDS if f in fields]
+
+        # Latest submission per user via the maintained pointer: one primary-key join per row
+        columns = [User.id] + [INSIGHT_USER_FIELDS[f] for f in user_fields]
+        if fin_fields:
+            columns += [UserFinancials.id.label('financials_id')] + [INSIGHT_FINANCIAL_FIELDS[f] for f in fin_fields]
+        query = db.session.query(*columns).outerjoin(UserFinancials, UserFinancials.id == User.latest_financials_id)
+
+        if after is not None:
+            query = query.filter(User.id > after)
+        groups = _list_arg('household_group')
+        if groups:
+            query = query.filter(User.household_group.in_(groups))
+        statuses = _list_arg('status')
+        if statuses:
+            query = query.filter(UserFinancials.salary_status.in_(statuses))
+        affected = _list_arg('most_affected_category')
+        if affected:
+            query = query.filter(UserFinancials.most_affected_category.in_(affected))
+        severities = _list_arg('severity')
+        if severities:
+            unknown = [v for v in severities if v not in SEVERITY_LEVELS]
+            if unknown:
+                return jsonify({"error": f"Unknown severity: {', '.join(unknown)}"}), 400
+            query = query.filter(SEVERITY.in_([SEVERITY_LEVELS[v] for v in severities]))
+        query = query.order_by(User.id)
+        if limit is not None:
+            query = query.limit(limit)
+
         result = []
-        
-        for u in users:
-            # Find the MOST RECENT financial submission for this user
-            latest = UserFinancials.query.filter_by(user_id=u.id).order_by(UserFinancials.created_at.desc()).first()
-            
-            financial_data = None
-            if latest:
-                financial_data = {
-                    "salary": latest.salary,
-                    "total_spend": latest.total_spend,
-                    "future_total_spend": latest.future_total_spend,
-                    "salary_status": latest.salary_status,
-                    "most_affected_category": latest.most_affected_category
-                }
-            
+        for r in query.all():
             # Format row
-            result.append({
-                "id": u.id,
-                "username": u.username,
-                "phone": u.phone or "Not Provided",
-                "household_group": u.household_group or "Not Provided",
-                "financials": financial_data # Can be None if no data
-            })
+            row = {"id": r.id}
+            for f in user_fields:
+                row[f] = getattr(r, f) or "Not Provided"
+            if fin_fields:
+                financial_data = None
+                if r.financials_id is not None:
+                    financial_data = {f: getattr(r, f) for f in fin_fields}
+                row["financials"] = financial_data # Can be None if no data
+            result.append(row)
         
-        return jsonify(result)
+        return _page_response(result, limit, result[-1]["id"] if result else None)
     except Exception as e:
         print(f"Error fetching insights: {e}")
         return jsonify({"error": "Internal Server Error"}), 500
+
+# --- Policy Maker: Dashboard KPIs and group stats ---
+@data_bp.route('/insights-summary', methods=['GET'])
+@etag_from(_insights_version)
+def get_insights_summary():
+    # Aggregated over every household's latest submission in SQL: a handful of GROUP BYs,
+    # so the response size (and dashboard load) does not grow with the population
+    try:
+        latest = db.session.query(User).join(UserFinancials, UserFinancials.id == User.latest_financials_id)
+        group = func.coalesce(User.household_group, "Not Provided")
+        impact = UserFinancials.future_total_spend - UserFinancials.total_spend
+
+        group_rows = latest.with_entities(
+            group.label('household_group'),
+            func.count().label('households'),
+            func.avg(UserFinancials.salary).label('avg_income'),
+            func.avg(impact).label('avg_impact'),
+            func.avg(SEVERITY).label('avg_severity'),
+            *[func.sum(case((SEVERITY == level, 1), else_=0)).label(name) for name, level in SEVERITY_LEVELS.items()]
+        ).group_by(group).order_by(group).all()
+
+        # Ties go to the alphabetically first category
+        category_rows = latest.with_entities(
+            UserFinancials.most_affected_category, func.count()
+        ).group_by(UserFinancials.most_affected_category).order_by(func.count().desc(), UserFinancials.most_affected_category).all()
+
+        status_rows = latest.with_entities(
+            UserFinancials.salary_status, func.count()
+        ).group_by(UserFinancials.salary_status).all()
+
+        households = sum(r.households for r in group_rows)
+        severity_counts = {name: sum(getattr(r, name) or 0 for r in group_rows) for name in SEVERITY_LEVELS}
+        top_category, top_count = category_rows[0] if category_rows else ("None", 0)
+
+        return jsonify({
+            "households": households,
+            "registered": User.query.count(),
+            "severity_counts": severity_counts,
+            "avg_severity": sum(r.avg_severity * r.households for r in group_rows) / households if households else None,
+            "status_counts": {status: count for status, count in status_rows},
+            "category_counts": {cat: count for cat, count in category_rows},
+            "most_affected": {
+                "category": top_category,
+                "households": top_count,
+                "share": top_count / households if households else 0
+            },
+            "groups": [{
+                "household_group": r.household_group,
+                "households": r.households,
+                "avg_income": r.avg_income,
+                "avg_impact": r.avg_impact,
+                "avg_severity": r.avg_severity,
+                "severity_counts": {name: getattr(r, name) for name in SEVERITY_LEVELS}
+            } for r in group_rows]
+        })
+    except Exception as e:
+        print(f"Error fetching insights summary: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
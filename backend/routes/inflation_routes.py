@@ -1,16 +1,180 @@
-from flask import Blueprint, jsonify
-from services.forecasting import generate_inflation_forecast, get_latest_rates
+from flask import Blueprint, Response, jsonify, request
+
+# services.forecasting pulls in pandas/NumPy (and Prophet on first fit), so it is
+# imported inside the handlers: workers that only serve auth/data routes never load it.
 
 inflation_bp = Blueprint('inflation', __name__)
 
 @inflation_bp.route('/forecast', methods=['GET'])
 def get_forecast():
-    forecast = generate_inflation_forecast(months=60)
-    return jsonify(forecast)
+    from datetime import datetime
+    from services.history import history
+    from services.forecasting import generate_inflation_forecast, get_forecast_frames
+    from services.http_cache import conditional, make_etag
+    from services import forecast_format
+
+    # ?months=1-60 (future), ?history=<past months>, ?categories=Food,Fuel
+    # ?engine=prophet|smoothing, defaults to FORECAST_ENGINE
+    # All of these are slices of one cached max-horizon fit, none of them refits.
+    # ?format=columnar, or Accept: application/x-msgpack / application/vnd.apache.arrow.stream,
+    # returns one float32 array per band on a shared epoch-month axis instead of point records.
+    if not history.exists():
+        return jsonify({"error": "Dataset not found"})
+    cats = request.args.get('categories')
+    try:
+        frames = get_forecast_frames(request.args.get('engine'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Validators follow the fit (dataset version, engine, build time) and its refresh state.
+    # Weak: the body's status.age_seconds ticks while the forecast itself is unchanged.
+    status = frames[1]
+    mimetype = forecast_format.negotiate(request.accept_mimetypes)
+    columnar = mimetype != forecast_format.JSON or request.args.get('format') == 'columnar'
+    etag = make_etag(status['dataset_version'], status['engine'], status['generated_at'],
+                     status['state'], status['stale'], status['refreshing'], mimetype)
+
+    def build():
+        try:
+            forecast = generate_inflation_forecast(
+                months=int(request.args.get('months', 60)),
+                categories=[c.strip() for c in cats.split(',') if c.strip()] if cats else None,
+                history=int(request.args.get('history', 24)),
+                engine=request.args.get('engine'),
+                frames=frames,
+                columnar=columnar
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if columnar:
+            return Response(forecast_format.encode(forecast, mimetype), mimetype=mimetype)
+        return jsonify(forecast)
+
+    response = conditional(etag, build, last_modified=datetime.fromisoformat(status['generated_at']), weak=True)
+    response.vary.add('Accept')
+    return response
 
 @inflation_bp.route('/rates', methods=['GET'])
 def get_rates():
+    # In-memory lookup on the indexed history, no pandas involved
+    from datetime import datetime, timezone
+    import os
+    from services.history import history, get_latest_rates
+    from services.http_cache import conditional, make_etag
+
     # Return latest known rates
     # Ideally, for calculator, we might want the average rate over the next N months, 
     # but initially we'll return the base rates that the calculator asks for.
-    return jsonify(get_latest_rates())
+    if not history.exists():
+        return jsonify(get_latest_rates())
+    # The rates only change with the dataset
+    modified = datetime.fromtimestamp(os.stat(history.watch_path).st_mtime, tz=timezone.utc)
+    return conditional(make_etag(history.snapshot().version), lambda: jsonify(get_latest_rates()), last_modified=modified)
+
+@inflation_bp.route('/project', methods=['POST'])
+def project_costs():
+    from services.history import history
+    from services.forecasting import get_forecast_frames, MAX_HORIZON
+    from services.projection import (
+        parse_budgets, parse_start_date, get_cost_index, project_budgets, to_records, projection_rates,
+        trajectory, project_horizons, horizon_records, horizon_rates, SUPPORTED_HORIZONS, MAX_PROJECTION_CELLS
+    )
+
+    # Body: one budget {"food", "fuel", "health", "extra_spend", "salary"} or {"budgets": [...]},
+    # plus "months" (1-60), optional "start_date" (YYYY-MM-DD) and "engine".
+    # Projects every budget against the cached forecast in one vectorized pass;
+    # "trajectory": true also returns the month-by-month growth path for charts.
+    # "horizons": [..] or "all" evaluates every horizon at once (the calculator's curve)
+    # instead of the single "months". "rates" (annualised, per category) is the same for every
+    # budget and comes once at the top level: a dict, or a list in "horizons" order.
+    data = request.json or {}
+    if not history.exists():
+        return jsonify({"error": "Dataset not found"}), 404
+    try:
+        horizons = data.get('horizons')
+        if horizons == 'all':
+            horizons = SUPPORTED_HORIZONS
+        if horizons is not None:
+            if not isinstance(horizons, list):
+                raise ValueError("horizons must be a list of months or \"all\"")
+            horizons = [int(h) for h in horizons]
+        months = int(data.get('months', max(horizons) if horizons else 12))
+        for h in (horizons or []) + [months]:
+            if not 1 <= h <= MAX_HORIZON:
+                raise ValueError(f"months must be between 1 and {MAX_HORIZON}")
+        spend, extra, salary = parse_budgets(data)
+        n_horizons = len(horizons) if horizons else 1
+        if len(spend) * n_horizons > MAX_PROJECTION_CELLS:
+            raise ValueError(f"budgets x horizons must be at most {MAX_PROJECTION_CELLS} "
+                             f"(at most {MAX_PROJECTION_CELLS // n_horizons} budgets for {n_horizons} horizon(s))")
+        start_date = parse_start_date(data.get('start_date'))
+        frames, status = get_forecast_frames(data.get('engine'))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    index = get_cost_index(frames, (status['dataset_version'], status['engine']))
+    result = {
+        "months": months,
+        "start_date": start_date.isoformat(),
+        "dataset_version": status['dataset_version']
+    }
+    if horizons:
+        projection = project_horizons(index, spend, extra, salary, horizons, start_date)
+        result["horizons"] = horizons
+        result["rates"] = horizon_rates(projection)
+        result["results"] = horizon_records(projection)
+    else:
+        projection = project_budgets(index, spend, extra, salary, months, start_date)
+        result["rates"] = projection_rates(projection)
+        result["results"] = to_records(projection, spend)
+    if data.get('trajectory'):
+        result["trajectory"] = trajectory(index, start_date, months)
+    return jsonify(result)
+
+@inflation_bp.route('/simulate', methods=['POST'])
+def simulate_risk():
+    from services.history import history
+    from services.forecasting import get_forecast_frames, MAX_HORIZON
+    from services.projection import parse_budgets, parse_start_date, SUPPORTED_HORIZONS
+    from services.montecarlo import simulate_budgets, simulation_records, DEFAULT_PATHS, MAX_PATHS, MAX_BUDGET_PATHS
+
+    # Monte Carlo budget risk. Same budget body as /project, plus optional
+    # "horizons" (default: all calculator horizons), "paths" and "seed".
+    # Returns the probability of deficit and savings percentiles per horizon.
+    data = request.json or {}
+    if not history.exists():
+        return jsonify({"error": "Dataset not found"}), 404
+    try:
+        horizons = data.get('horizons') or SUPPORTED_HORIZONS
+        if horizons == 'all':
+            horizons = SUPPORTED_HORIZONS
+        if not isinstance(horizons, list):
+            raise ValueError("horizons must be a list of months or \"all\"")
+        horizons = [int(h) for h in horizons]
+        if any(not 1 <= h <= MAX_HORIZON for h in horizons):
+            raise ValueError(f"horizons must be between 1 and {MAX_HORIZON}")
+        paths = int(data.get('paths', DEFAULT_PATHS))
+        if not 100 <= paths <= MAX_PATHS:
+            raise ValueError(f"paths must be between 100 and {MAX_PATHS}")
+        seed = data.get('seed')
+        seed = int(seed) if seed is not None else None
+        spend, extra, salary = parse_budgets(data)
+        if len(spend) * paths > MAX_BUDGET_PATHS:
+            raise ValueError(f"budgets x paths must be at most {MAX_BUDGET_PATHS} "
+                             f"(at most {MAX_BUDGET_PATHS // paths} budgets at {paths} paths)")
+        start_date = parse_start_date(data.get('start_date'))
+        frames, status = get_forecast_frames(data.get('engine'))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = simulate_budgets(frames, history.snapshot(), spend, extra, salary, horizons, start_date, paths, seed)
+    return jsonify({
+        "start_date": start_date.isoformat(),
+        "dataset_version": status['dataset_version'],
+        "horizons": result['horizons'],
+        "paths": result['paths'],
+        "correlation": result['correlation'].tolist(),
+        "persistence": result['persistence'],
+        "elapsed_ms": round(result['elapsed_ms'], 1),
+        "results": simulation_records(result)
+    })
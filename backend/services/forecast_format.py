@@ -0,0 +1,71 @@
+import json
+import importlib.util
+
+from services import json_provider
+
+# Columnar forecast encodings, negotiated from the Accept header. msgpack and pyarrow
+# are optional: a format is only offered when its package is installed, and pyarrow is
+# imported on first use so workers that never serve Arrow do not pay for it.
+JSON = 'application/json'
+MSGPACK = 'application/x-msgpack'
+MSGPACK_ALIASES = ('application/msgpack', 'application/vnd.msgpack')
+ARROW = 'application/vnd.apache.arrow.stream'
+
+HAS_MSGPACK = importlib.util.find_spec('msgpack') is not None
+HAS_ARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def negotiate(accept):
+    # JSON is listed first, so */* (or no Accept header) keeps the JSON default
+    offers = [JSON]
+    if HAS_MSGPACK:
+        offers += [MSGPACK, *MSGPACK_ALIASES]
+    if HAS_ARROW:
+        offers.append(ARROW)
+    best = accept.best_match(offers, default=JSON)
+    return MSGPACK if best in MSGPACK_ALIASES else best
+
+
+def _json_floats(values):
+    # float32 values as their shortest decimal (5.3, not 5.300000190734863); NaN -> null
+    return [None if v != v else float(str(v)) for v in values]
+
+
+def encode(columnar, mimetype):
+    # columnar: generate_inflation_forecast(..., columnar=True). Returns the body bytes.
+    #   {"format": "columnar", "ds": [epoch months], "Food": {"yhat": [...], ...}, ..., "status": {...}}
+    # Epoch month m is year m // 12, month m % 12 + 1.
+    months = columnar['months']
+    if mimetype == ARROW:
+        import pyarrow as pa
+
+        arrays = [pa.array(months, type=pa.int32())]
+        names = ['ds']
+        for cat, bands in columnar['categories'].items():
+            for band, values in bands.items():
+                arrays.append(pa.array(values, type=pa.float32(), from_pandas=True))
+                names.append(f"{cat}.{band}")
+        metadata = {b'format': b'columnar', b'status': json.dumps(columnar['status']).encode('utf-8')}
+        batch = pa.RecordBatch.from_arrays(arrays, names=names)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema.with_metadata(metadata)) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    if mimetype == MSGPACK:
+        import msgpack
+
+        body = {"format": "columnar", "ds": months.tolist()}
+        for cat, bands in columnar['categories'].items():
+            body[cat] = {band: values.tolist() for band, values in bands.items()}
+        body["status"] = columnar['status']
+        # Floats go over the wire as float32
+        return msgpack.packb(body, use_single_float=True)
+
+    # orjson writes the float32 arrays directly (shortest float32 decimals, NaN -> null)
+    floats = (lambda values: values) if json_provider.HAS_ORJSON else _json_floats
+    body = {"format": "columnar", "ds": months}
+    for cat, bands in columnar['categories'].items():
+        body[cat] = {band: floats(values) for band, values in bands.items()}
+    body["status"] = columnar['status']
+    return json_provider.dumps(body)
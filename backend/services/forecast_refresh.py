@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+FORECAST_TTL_SECONDS = int(os.getenv('FORECAST_TTL_SECONDS', 24 * 3600))
+# After a failed background build, wait this long before trying again
+RETRY_SECONDS = 60
+
+
+def _fingerprint(path):
+    # Cheap change detector; the content hash is only recomputed when this moves
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class ForecastRefresher:
+    # Stale-while-revalidate wrapper around a forecast build.
+    # build(force) -> (dataset_key, frames, created_at). The last good result is
+    # served immediately; a data change or TTL expiry triggers a rebuild on a
+    # background thread instead of blocking the request.
+
+    def __init__(self, build, data_path, ttl=FORECAST_TTL_SECONDS):
+        self.build = build
+        self.data_path = data_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._current = None  # dict(key, frames, created_at, fingerprint)
+        self._thread = None
+        self._last_error = None
+        self._failed_at = 0.0
+
+    def get(self):
+        fingerprint = _fingerprint(self.data_path)
+
+        with self._lock:
+            current = self._current
+
+        if current is None:
+            # Nothing to serve yet: first build happens inline (usually a store hit)
+            current = self._run_build(force=False, fingerprint=fingerprint)
+            return current['frames'], self._status(current, fingerprint)
+
+        if self._is_stale(current, fingerprint):
+            self._start_refresh(force=current['fingerprint'] == fingerprint)
+        return current['frames'], self._status(current, fingerprint)
+
+    def _is_stale(self, current, fingerprint):
+        if current['fingerprint'] != fingerprint:
+            return True
+        return self.ttl > 0 and time.time() - current['created_at'] > self.ttl
+
+    def _run_build(self, force, fingerprint):
+        key, frames, created_at = self.build(force)
+        current = {"key": key, "frames": frames, "created_at": created_at, "fingerprint": fingerprint}
+        with self._lock:
+            self._current = current
+            self._last_error = None
+        return current
+
+    def _start_refresh(self, force):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if time.time() - self._failed_at < RETRY_SECONDS:
+                return
+            self._thread = threading.Thread(target=self._refresh, args=(force,), name="forecast-refresh", daemon=True)
+            self._thread.start()
+
+    def _refresh(self, force):
+        # Fingerprint is taken before the build so edits made mid-fit trigger another pass
+        fingerprint = _fingerprint(self.data_path)
+        started = time.time()
+        try:
+            self._run_build(force=force, fingerprint=fingerprint)
+            logger.info("Forecast refreshed in %.1fs", time.time() - started)
+        except Exception as e:
+            logger.exception("Background forecast refresh failed")
+            with self._lock:
+                self._last_error = str(e)
+                self._failed_at = time.time()
+
+    def refreshing(self):
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def _status(self, current, fingerprint):
+        age = max(0.0, time.time() - current['created_at'])
+        stale = self._is_stale(current, fingerprint)
+        refreshing = self.refreshing()
+        if refreshing:
+            state = "refreshing"
+        elif self._last_error:
+            state = "error"
+        else:
+            state = "stale" if stale else "fresh"
+        return {
+            "state": state,
+            "stale": stale,
+            "refreshing": refreshing,
+            "dataset_version": current['key'],
+            "generated_at": datetime.fromtimestamp(current['created_at'], tz=timezone.utc).isoformat(),
+            "age_seconds": round(age, 1),
+            "ttl_seconds": self.ttl,
+            "last_error": self._last_error
+        }
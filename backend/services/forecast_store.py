@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(__file__), '../data/forecast_cache')
+FRAME_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def make_key(dataset_version, params):
+    # Dataset content hash + model parameters.
+    # Any edit to the data (or to the engine settings) produces a new key.
+    h = hashlib.sha256(dataset_version.encode('utf-8'))
+    h.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+class ForecastStore:
+    # Fitted models + forecast frames, persisted on disk as:
+    #   <root>/<key>/manifest.json
+    #   <root>/<key>/<category>.model.json   (prophet.serialize.model_to_json)
+    #   <root>/<key>/<category>.forecast.csv
+    #   <root>/lineage-<lineage>.json        -> last key written for an engine/params combo
+    # A small in-memory LRU of (created_at, frames) sits in front of the disk copy.
+
+    def __init__(self, root=DEFAULT_STORE_DIR, memory_slots=4):
+        self.root = os.path.abspath(root)
+        self.memory_slots = memory_slots
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key, min_created_at=None):
+        # Returns {category: forecast DataFrame} or None on a miss.
+        # min_created_at ignores entries built before that time (forced refits)
+        manifest = None
+        if min_created_at is not None:
+            manifest = self.manifest(key)
+            if manifest is None or manifest['created_at'] < min_created_at:
+                return None
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and (manifest is None or cached[0] >= manifest['created_at']):
+                self._memory.move_to_end(key)
+                return cached[1]
+
+        manifest = manifest or self.manifest(key)
+        frames = self._read_frames(key, manifest)
+        if frames is not None:
+            self._remember(key, frames, manifest['created_at'])
+        return frames
+
+    def put(self, key, fitted, params=None, lineage=None, extra=None):
+        # fitted: {category: (model_json, forecast DataFrame)}
+        # lineage: id shared by successive dataset versions fitted with the same params,
+        # so the next build can find this one to reuse / warm-start from
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=self.root)
+        try:
+            frames = {}
+            for cat, (model_json, frame) in fitted.items():
+                frame = frame[FRAME_COLUMNS].reset_index(drop=True)
+                frames[cat] = frame
+                if model_json is not None:
+                    with open(os.path.join(tmp_dir, f"{cat}.model.json"), 'w') as f:
+                        f.write(model_json)
+                frame.to_csv(os.path.join(tmp_dir, f"{cat}.forecast.csv"), index=False)
+
+            created_at = time.time()
+            manifest = {
+                "key": key,
+                "categories": list(fitted.keys()),
+                "params": params or {},
+                "created_at": created_at,
+                **(extra or {})
+            }
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f)
+
+            # Publish atomically; a forced refit replaces the previous entry
+            target = self._entry_dir(key)
+            if os.path.isdir(target):
+                retired = tempfile.mkdtemp(prefix=f".{key}-old-", dir=self.root)
+                os.replace(target, os.path.join(retired, 'entry'))
+                os.replace(tmp_dir, target)
+                shutil.rmtree(retired, ignore_errors=True)
+            else:
+                os.replace(tmp_dir, target)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if lineage is not None:
+            self._write_json(os.path.join(self.root, f"lineage-{lineage}.json"), {"key": key})
+
+        self._remember(key, frames, created_at)
+        return frames
+
+    def latest(self, lineage):
+        # Key of the most recent entry in this lineage, if it is still on disk
+        path = os.path.join(self.root, f"lineage-{lineage}.json")
+        try:
+            with open(path) as f:
+                key = json.load(f)['key']
+        except (OSError, ValueError, KeyError):
+            return None
+        return key if os.path.isdir(self._entry_dir(key)) else None
+
+    def model_json(self, key, category):
+        path = os.path.join(self._entry_dir(key), f"{category}.model.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read()
+
+    def manifest(self, key):
+        path = os.path.join(self._entry_dir(key), 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _read_frames(self, key, manifest):
+        if manifest is None:
+            return None
+        frames = {}
+        try:
+            for cat in manifest['categories']:
+                path = os.path.join(self._entry_dir(key), f"{cat}.forecast.csv")
+                frames[cat] = pd.read_csv(path, parse_dates=['ds'])
+        except (OSError, ValueError, KeyError):
+            # Partial / corrupt entry: treat as a miss, it will be refitted
+            return None
+        return frames
+
+    def _write_json(self, path, payload):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def _remember(self, key, frames, created_at):
+        with self._lock:
+            self._memory[key] = (created_at, frames)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_slots:
+                self._memory.popitem(last=False)
+
+
+forecast_store = ForecastStore(os.getenv('FORECAST_STORE_DIR', DEFAULT_STORE_DIR))
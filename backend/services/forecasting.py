@@ -1,53 +1,354 @@
+import numpy as np
 import pandas as pd
-from prophet import Prophet
 import os
+import json
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-DATA_PATH = os.path.join(os.path.dirname(__file__), '../data/inflation_history.csv')
+from services.forecast_store import forecast_store, make_key
+from services.forecast_refresh import ForecastRefresher
+from services.singleflight import SingleFlight
+from services.history import history as inflation_history, get_latest_rates
+
+logger = logging.getLogger(__name__)
+
+DATA_PATH = inflation_history.path
+CATEGORIES = ['Food', 'Fuel', 'Healthcare']
+PROPHET_PARAMS = {"yearly_seasonality": True, "weekly_seasonality": False, "daily_seasonality": False}
+HISTORY_MONTHS = 24
+# Every dataset version is fitted once at the longest horizon; shorter requests are slices of it
+MAX_HORIZON = 60
+INTERVAL_WIDTH = 0.8 # Prophet's default uncertainty interval
+
+# Engine used when a request does not ask for one: 'prophet' (accurate) or 'smoothing' (fast)
+FORECAST_ENGINE = os.getenv('FORECAST_ENGINE', 'prophet')
+
+# Parallel fitting: one Prophet fit per category on a process pool that lives only for
+# that fit, so idle web workers do not keep fitter processes (and Prophet) in memory.
+# Each fit spawns fresh children that re-import pandas + Prophet (~1.2 s) before fitting
+# (~0.33 s per category), so a pool only pays off with many categories: with 3, serial
+# took 1.0 s and 2 workers 4.2 s. Serial by default; set FORECAST_WORKERS > 1 to allow
+# the pool for fits of at least FORECAST_PARALLEL_MIN_CATEGORIES categories.
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', 1))
+FORECAST_PARALLEL_MIN_CATEGORIES = int(os.getenv('FORECAST_PARALLEL_MIN_CATEGORIES', 8))
+
+# Concurrent builds of the same forecast share one fit. FORECAST_FILE_LOCK=1 extends
+# this across gunicorn workers via an flock next to the forecast store.
+_flights = SingleFlight(
+    lock_dir=os.path.join(forecast_store.root, 'locks') if os.getenv('FORECAST_FILE_LOCK') == '1' else None
+)
+
+# One stale-while-revalidate refresher per engine (always at MAX_HORIZON)
+_refreshers = {}
+_refreshers_lock = threading.Lock()
+
+def _warm_start_params(m):
+    # Fitted MAP parameters of a previous model, in the shape Prophet.fit(init=...) takes
+    res = {}
+    for pname in ['k', 'm', 'sigma_obs']:
+        res[pname] = m.params[pname][0][0]
+    for pname in ['delta', 'beta']:
+        res[pname] = m.params[pname][0]
+    return res
+
+def fit_category(df, category, months=60, init_json=None):
+    # Prophet (and cmdstanpy behind it) is only imported once something actually fits
+    from prophet import Prophet
 
-def get_forecast_for_category(df, category, months=60):
     # Filter and setup for Prophet (ds, y)
     cat_df = df[df['category'] == category].copy()
     cat_df = cat_df.rename(columns={'date': 'ds', 'rate': 'y'})
     cat_df['ds'] = pd.to_datetime(cat_df['ds'])
-    
+
     # Train
-    m = Prophet(yearly_seasonality=True, weekly_seasonality=False, daily_seasonality=False)
-    m.fit(cat_df)
-    
+    m = Prophet(**PROPHET_PARAMS)
+    if init_json is not None:
+        # Warm start from the previous version's model: the optimizer begins at its optimum
+        from prophet.serialize import model_from_json
+        try:
+            m.fit(cat_df, init=_warm_start_params(model_from_json(init_json)))
+        except Exception as e:
+            logger.warning("Warm start failed for %s (%s), fitting from scratch", category, e)
+            m = Prophet(**PROPHET_PARAMS)
+            m.fit(cat_df)
+    else:
+        m.fit(cat_df)
+
     # Predict
     future = m.make_future_dataframe(periods=months, freq='MS')
     forecast = m.predict(future)
-    
-    # Extract results
-    # Past 24 months + Future
-    total_len = len(forecast)
-    # We want valid history + future. 
-    # Let's return the tail(24 + months) generally
-    return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(24 + months).to_dict('records')
-
-def generate_inflation_forecast(months=60):
-    if not os.path.exists(DATA_PATH):
-        return {"error": "Dataset not found"}
-        
-    df = pd.read_csv(DATA_PATH)
-    
-    results = {}
-    categories = ['Food', 'Fuel', 'Healthcare']
-    
+    return m, forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+def _to_records(forecast, horizon, months, history=HISTORY_MONTHS):
+    # forecast holds the fitted history followed by `horizon` future months.
+    # Return the last `history` fitted months + the first `months` future ones.
+    n_hist = len(forecast) - horizon
+    return forecast.iloc[max(0, n_hist - history):n_hist + months].to_dict('records')
+
+BANDS = ('yhat', 'yhat_lower', 'yhat_upper')
+
+def _to_columns(frames, categories, horizon, months, history=HISTORY_MONTHS):
+    # Same window as _to_records, as arrays on one shared epoch-month axis (int32) with
+    # float32 bands; a category that does not cover the whole axis is NaN-padded
+    windows = {}
     for cat in categories:
-        forecast_data = get_forecast_for_category(df, cat, months)
-        results[cat] = forecast_data
-        
-    return results
-
-def get_latest_rates():
-    if not os.path.exists(DATA_PATH):
-        return {"Food": 0.08, "Fuel": 0.06, "Healthcare": 0.10} # Fallback
-        
-    df = pd.read_csv(DATA_PATH)
-    latest_rates = {}
-    for cat in ['Food', 'Fuel', 'Healthcare']:
-        # Get last recorded rate
-        val = df[df['category'] == cat].iloc[-1]['rate']
-        latest_rates[cat] = val / 100.0 # Convert 8.0 to 0.08
-    return latest_rates
+        forecast = frames[cat]
+        n_hist = len(forecast) - horizon
+        window = forecast.iloc[max(0, n_hist - history):n_hist + months]
+        ds = window['ds'].dt
+        windows[cat] = ((ds.year * 12 + ds.month - 1).to_numpy(dtype=np.int32), window)
+
+    first = min(int(m[0]) for m, _ in windows.values())
+    last = max(int(m[-1]) for m, _ in windows.values())
+    axis = np.arange(first, last + 1, dtype=np.int32)
+    columns = {}
+    for cat, (month_idx, window) in windows.items():
+        pos = month_idx - first
+        columns[cat] = {}
+        for band in BANDS:
+            values = np.full(len(axis), np.nan, dtype=np.float32)
+            values[pos] = window[band].to_numpy(dtype=np.float32)
+            columns[cat][band] = values
+    return axis, columns
+
+def get_forecast_for_category(df, category, months=60):
+    _, forecast = fit_category(df, category, months)
+    return _to_records(forecast, months, months)
+
+def _fit_task(cat_df, category, months, init_json=None):
+    # Runs inside a pool worker; the model goes back as JSON since it is what the store persists anyway
+    from prophet.serialize import model_to_json
+    m, forecast = fit_category(cat_df, category, months, init_json)
+    return model_to_json(m), forecast
+
+def _new_pool(workers):
+    # spawn: the web worker is multi-threaded, forking it is not safe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+def _fit_serial(df, categories, months, warm_start):
+    return {cat: _fit_task(df, cat, months, warm_start.get(cat)) for cat in categories}
+
+def fit_categories(df, categories, months=60, workers=None, warm_start=None):
+    # Returns {category: (model_json, forecast DataFrame)}
+    # warm_start: {category: previous model_json} to initialise those fits from
+    warm_start = warm_start or {}
+    workers = FORECAST_WORKERS if workers is None else workers
+    workers = min(workers, len(categories))
+    if workers <= 1 or len(categories) < FORECAST_PARALLEL_MIN_CATEGORIES:
+        return _fit_serial(df, categories, months, warm_start)
+
+    try:
+        # Leaving the block shuts the pool down and its processes exit
+        with _new_pool(workers) as pool:
+            # Ship only each category's rows to its worker
+            futures = {
+                cat: pool.submit(_fit_task, df[df['category'] == cat], cat, months, warm_start.get(cat))
+                for cat in categories
+            }
+            return {cat: fut.result() for cat, fut in futures.items()}
+    except (BrokenProcessPool, OSError, RuntimeError) as e:
+        logger.warning("Parallel forecast fit failed (%s), falling back to serial", e)
+        return _fit_serial(df, categories, months, warm_start)
+
+# --- Forecast Engines ---
+# An engine turns the long-format history (date, category, rate) into one forecast
+# frame (ds, yhat, yhat_lower, yhat_upper) per category, history + `months` ahead.
+class ForecastEngine:
+    name = None
+    params = {}
+    supports_warm_start = False
+
+    def fit(self, df, categories, months, warm_start=None):
+        # Returns {category: (model_json, forecast DataFrame)}
+        # warm_start: {category: model_json of the previous fit}, engines may ignore it
+        raise NotImplementedError
+
+class ProphetEngine(ForecastEngine):
+    name = 'prophet'
+    params = PROPHET_PARAMS
+    supports_warm_start = True
+
+    def fit(self, df, categories, months, warm_start=None):
+        return fit_categories(df, categories, months, warm_start=warm_start)
+
+class SmoothingEngine(ForecastEngine):
+    # Damped additive Holt-Winters with a 12-month season. The recursion runs once over
+    # time with every category as a row of one array, so cost is ~O(T) NumPy ops total.
+    name = 'smoothing'
+
+    def __init__(self, alpha=0.3, beta=0.05, gamma=0.2, phi=0.98, season_length=12):
+        self.params = {"alpha": alpha, "beta": beta, "gamma": gamma, "phi": phi, "season_length": season_length}
+
+    def fit(self, df, categories, months, warm_start=None):
+        p = self.params
+        alpha, beta, gamma, phi, m = p['alpha'], p['beta'], p['gamma'], p['phi'], p['season_length']
+
+        wide = df.pivot(index='date', columns='category', values='rate')[categories]
+        wide.index = pd.to_datetime(wide.index)
+        wide = wide.sort_index().interpolate(limit_direction='both')
+        y = wide.to_numpy(dtype=float).T # (categories, months)
+        n = y.shape[1]
+        if n < 2 * m:
+            raise ValueError(f"Smoothing engine needs at least {2 * m} months of history")
+
+        # Initial state from the first two seasons
+        level = y[:, :m].mean(axis=1)
+        trend = (y[:, m:2 * m].mean(axis=1) - level) / m
+        season = y[:, :m] - level[:, None]
+
+        fitted = np.empty_like(y)
+        for t in range(n):
+            s_t = season[:, t % m]
+            fitted[:, t] = level + phi * trend + s_t
+            prev_level = level
+            level = alpha * (y[:, t] - s_t) + (1 - alpha) * (prev_level + phi * trend)
+            trend = beta * (level - prev_level) + (1 - beta) * phi * trend
+            season[:, t % m] = gamma * (y[:, t] - level) + (1 - gamma) * s_t
+
+        # Residual spread after the warm-up season drives the intervals
+        sigma = (y[:, m:] - fitted[:, m:]).std(axis=1, ddof=1)
+        z = _interval_z(INTERVAL_WIDTH)
+
+        h = np.arange(1, months + 1)
+        damped = np.cumsum(phi ** h) # phi + phi^2 + ... + phi^h
+        future = level[:, None] + damped[None, :] * trend[:, None] + season[:, (n + h - 1) % m]
+        spread = z * sigma[:, None] * np.sqrt(1 + (h - 1) * alpha ** 2)[None, :]
+
+        yhat = np.concatenate([fitted, future], axis=1)
+        half = np.concatenate([np.repeat(z * sigma[:, None], n, axis=1), spread], axis=1)
+        ds = wide.index.append(pd.date_range(wide.index[-1], periods=months + 1, freq='MS')[1:])
+
+        results = {}
+        for i, cat in enumerate(categories):
+            frame = pd.DataFrame({
+                "ds": ds,
+                "yhat": yhat[i],
+                "yhat_lower": yhat[i] - half[i],
+                "yhat_upper": yhat[i] + half[i]
+            })
+            state = {
+                "engine": self.name, "params": p,
+                "level": float(level[i]), "trend": float(trend[i]),
+                "season": season[i].tolist(), "sigma": float(sigma[i])
+            }
+            results[cat] = (json.dumps(state), frame)
+        return results
+
+def _interval_z(width):
+    from statistics import NormalDist
+    return NormalDist().inv_cdf(0.5 + width / 2)
+
+ENGINES = {engine.name: engine for engine in (ProphetEngine(), SmoothingEngine())}
+
+def get_engine(name=None):
+    name = name or FORECAST_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown forecast engine '{name}'. Available: {', '.join(sorted(ENGINES))}")
+    return ENGINES[name]
+
+def _fit_incremental(engine, snapshot, key, params, months, force):
+    # Refit only the categories whose series changed since the last build in this
+    # lineage (same engine/params); the rest keep their stored model + forecast.
+    lineage = make_key('lineage', params)
+    prev_key = None if force else forecast_store.latest(lineage)
+    prev = forecast_store.manifest(prev_key) if prev_key else None
+    prev_frames = forecast_store.get(prev_key) if prev else None
+    prev_versions = prev.get('category_versions', {}) if prev_frames else {}
+
+    versions = {cat: snapshot.category_version(cat) for cat in CATEGORIES}
+    unchanged = [cat for cat in CATEGORIES if prev_versions.get(cat) == versions[cat]]
+    changed = [cat for cat in CATEGORIES if cat not in unchanged]
+
+    fitted = {cat: (forecast_store.model_json(prev_key, cat), prev_frames[cat]) for cat in unchanged}
+    warm_start = {}
+    if prev_frames and engine.supports_warm_start:
+        warm_start = {cat: forecast_store.model_json(prev_key, cat) for cat in changed}
+        warm_start = {cat: j for cat, j in warm_start.items() if j is not None}
+
+    started = time.time()
+    if changed:
+        fitted.update(engine.fit(snapshot.to_frame(changed), changed, months, warm_start=warm_start))
+    fit_seconds = time.time() - started
+    fitted = {cat: fitted[cat] for cat in CATEGORIES}
+
+    # Cost of the last from-scratch fit of everything, carried forward as the baseline
+    full_fit_seconds = (prev or {}).get('full_fit_seconds')
+    if not unchanged and not warm_start:
+        full_fit_seconds = fit_seconds
+    if unchanged or warm_start:
+        saved = f", ~{full_fit_seconds - fit_seconds:.2f}s saved vs full refit ({full_fit_seconds:.2f}s)" if full_fit_seconds else ""
+        logger.info(
+            "Incremental %s forecast: refit %s (warm start: %s), reused %s in %.2fs%s",
+            engine.name, changed or "nothing", sorted(warm_start) or "none", unchanged or "nothing", fit_seconds, saved
+        )
+
+    return forecast_store.put(key, fitted, params, lineage=lineage, extra={
+        "category_versions": versions,
+        "refit_categories": changed,
+        "fit_seconds": fit_seconds,
+        "full_fit_seconds": full_fit_seconds
+    })
+
+def build_forecast(months=MAX_HORIZON, force=False, engine=None):
+    # Returns (dataset_key, {category: forecast DataFrame}, created_at)
+    engine = get_engine(engine)
+    params = {"engine": engine.name, engine.name: engine.params, "months": months, "categories": CATEGORIES}
+    snapshot = inflation_history.snapshot()
+    key = make_key(snapshot.version, params)
+    requested_at = time.time()
+
+    def compute():
+        # Serve the stored fit while the dataset (and model params) are unchanged.
+        # A forced refit still accepts one that finished after it was requested,
+        # i.e. by the leader we just waited on in another worker.
+        frames = forecast_store.get(key, min_created_at=requested_at if force else None)
+        if frames is None:
+            frames = _fit_incremental(engine, snapshot, key, params, months, force)
+        manifest = forecast_store.manifest(key) or {}
+        return key, frames, manifest.get('created_at', time.time())
+
+    return _flights.do((key, engine.name, months, tuple(CATEGORIES)), compute)
+
+def _get_refresher(engine):
+    with _refreshers_lock:
+        if engine not in _refreshers:
+            _refreshers[engine] = ForecastRefresher(
+                lambda force: build_forecast(MAX_HORIZON, force, engine), inflation_history.watch_path
+            )
+        return _refreshers[engine]
+
+def get_forecast_frames(engine=None):
+    # Full max-horizon frames for the current dataset version + refresh status.
+    # Shared by the forecast route and the projection endpoints.
+    engine = get_engine(engine).name
+    frames, status = _get_refresher(engine).get()
+    return frames, dict(status, engine=engine)
+
+def generate_inflation_forecast(months=60, categories=None, history=HISTORY_MONTHS, engine=None, frames=None, columnar=False):
+    # `frames` is a (frames, status) pair the caller already fetched via get_forecast_frames
+    # (the route uses its status for cache validators), so both describe the same fit.
+    # columnar=True returns {"months": epoch months, "categories": {cat: {band: float32[]}},
+    # "status"} for services.forecast_format instead of per-point records
+    if not inflation_history.exists():
+        return {"error": "Dataset not found"}
+
+    categories = categories or CATEGORIES
+    unknown = [c for c in categories if c not in CATEGORIES]
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+    if not 1 <= months <= MAX_HORIZON:
+        raise ValueError(f"months must be between 1 and {MAX_HORIZON}")
+    if history < 0:
+        raise ValueError("history must be >= 0")
+
+    frames, status = frames or get_forecast_frames(engine)
+    if columnar:
+        axis, columns = _to_columns(frames, categories, MAX_HORIZON, months, history)
+        return {"months": axis, "categories": columns, "status": status}
+    result = {cat: _to_records(frames[cat], MAX_HORIZON, months, history) for cat in categories}
+    result["status"] = status
+    return result
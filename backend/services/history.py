@@ -0,0 +1,239 @@
+import os
+import csv
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data/inflation_history.csv')
+FALLBACK_RATES = {"Food": 0.08, "Fuel": 0.06, "Healthcare": 0.10}
+
+# Columnar layout: a directory holding manifest.json + one .npy column per category
+COLUMNAR_SUFFIX = '.cols'
+COLUMNAR_FORMAT = 'hiei-columnar/1'
+
+
+def to_epoch_month(year, month):
+    # Months since year 0; consecutive calendar months are consecutive integers
+    return year * 12 + (month - 1)
+
+
+def from_epoch_month(m):
+    return int(m) // 12, int(m) % 12 + 1
+
+
+class HistorySnapshot:
+    # One immutable load of the dataset, held column-wise:
+    #   months  int32[M]      dense, consecutive epoch months (first..last)
+    #   values  float64[M] x C one array per category (in-memory or np.memmap),
+    #                         NaN where a month is missing
+    # A (category, month) lookup is two dict/offset computations, no scan.
+
+    def __init__(self, categories, months, values, version, latest=None):
+        self.categories = categories
+        self.months = months
+        self.values = values
+        self.version = version
+        self.start = int(months[0]) if len(months) else 0
+        self._cat_index = {c: i for i, c in enumerate(categories)}
+
+        # Last observed value per category, precomputed for O(1) latest lookups
+        if latest is None:
+            latest = {}
+            for i, cat in enumerate(categories):
+                observed = np.flatnonzero(~np.isnan(values[i]))
+                if len(observed):
+                    latest[cat] = (self.start + int(observed[-1]), float(values[i][observed[-1]]))
+        self._latest = latest
+        self._category_versions = {}
+
+    def _row(self, category):
+        if category not in self._cat_index:
+            raise KeyError(f"Unknown category '{category}'")
+        return self.values[self._cat_index[category]]
+
+    def category_version(self, category):
+        # Content hash of one category's observations: tells which series changed
+        # between two dataset versions (e.g. after a month is appended)
+        if category not in self._category_versions:
+            vals = np.asarray(self._row(category), dtype=np.float64)
+            observed = np.flatnonzero(~np.isnan(vals))
+            h = hashlib.sha256(category.encode('utf-8'))
+            h.update((self.months[observed]).astype(np.int64).tobytes())
+            h.update(vals[observed].tobytes())
+            self._category_versions[category] = h.hexdigest()[:32]
+        return self._category_versions[category]
+
+    def latest(self, category):
+        # (epoch month, rate) of the last observation, or None
+        return self._latest.get(category)
+
+    def value(self, category, month):
+        pos = month - self.start
+        if not 0 <= pos < len(self.months):
+            return None
+        val = self._row(category)[pos]
+        return None if np.isnan(val) else float(val)
+
+    def range(self, category, start=None, end=None):
+        # Rates for epoch months [start, end], as array views (no copy)
+        lo = 0 if start is None else max(0, start - self.start)
+        hi = len(self.months) if end is None else min(len(self.months), end - self.start + 1)
+        return self.months[lo:hi], self._row(category)[lo:hi]
+
+    def to_frame(self, categories=None):
+        # Long (date, category, rate) DataFrame, the shape the forecast engines fit on
+        import pandas as pd
+
+        years, months = np.divmod(self.months, 12)
+        dates = pd.to_datetime({"year": years, "month": months + 1, "day": 1})
+        parts = []
+        for cat in categories or self.categories:
+            vals = self._row(cat)
+            mask = ~np.isnan(vals)
+            parts.append(pd.DataFrame({"date": dates[mask].values, "category": cat, "rate": vals[mask]}))
+        return pd.concat(parts, ignore_index=True)
+
+
+def load_csv(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    version = hashlib.sha256(raw).hexdigest()[:32]
+
+    points = {}
+    categories = []
+    for row in csv.DictReader(raw.decode('utf-8').splitlines()):
+        d = row['date']
+        month = to_epoch_month(int(d[0:4]), int(d[5:7]))
+        cat = row['category']
+        if cat not in points:
+            points[cat] = {}
+            categories.append(cat)
+        points[cat][month] = float(row['rate'])
+
+    all_months = [m for p in points.values() for m in p]
+    if not all_months:
+        return HistorySnapshot([], np.zeros(0, dtype=np.int32), np.zeros((0, 0)), version)
+
+    start, end = min(all_months), max(all_months)
+    months = np.arange(start, end + 1, dtype=np.int32)
+    values = np.full((len(categories), len(months)), np.nan)
+    for i, cat in enumerate(categories):
+        idx = np.fromiter(points[cat].keys(), dtype=np.int64) - start
+        values[i, idx] = np.fromiter(points[cat].values(), dtype=float)
+    return HistorySnapshot(categories, months, values, version)
+
+
+def write_columnar(snapshot, dest):
+    # Writes the snapshot as <dest>/manifest.json + <dest>/NNNN.npy (one per category), then swaps
+    # the directory into place so readers never see a half-written dataset
+    dest = os.path.abspath(dest)
+    parent = os.path.dirname(dest)
+    tmp_dir = tempfile.mkdtemp(prefix='.cols-', dir=parent)
+    try:
+        h = hashlib.sha256()
+        files = {}
+        for i, cat in enumerate(snapshot.categories):
+            column = np.ascontiguousarray(snapshot.values[i], dtype=np.float64)
+            h.update(cat.encode('utf-8'))
+            h.update(column.tobytes())
+            files[cat] = f"{i:04d}.npy"
+            np.save(os.path.join(tmp_dir, files[cat]), column)
+
+        manifest = {
+            "format": COLUMNAR_FORMAT,
+            "start_month": snapshot.start,
+            "n_months": len(snapshot.months),
+            "categories": snapshot.categories,
+            "files": files,
+            "latest": {cat: list(v) for cat, v in snapshot._latest.items()},
+            "content_hash": h.hexdigest()[:32]
+        }
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.isdir(dest):
+            retired = tempfile.mkdtemp(prefix='.cols-old-', dir=parent)
+            os.replace(dest, os.path.join(retired, 'data'))
+            os.replace(tmp_dir, dest)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, dest)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def load_columnar(path):
+    # Columns are memory-mapped read-only: every worker on the host maps the same
+    # page-cache pages instead of holding its own parsed copy
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != COLUMNAR_FORMAT:
+        raise ValueError(f"Unsupported history format: {manifest.get('format')}")
+
+    categories = manifest['categories']
+    months = np.arange(manifest['start_month'], manifest['start_month'] + manifest['n_months'], dtype=np.int32)
+    values = [np.load(os.path.join(path, manifest['files'][cat]), mmap_mode='r') for cat in categories]
+    latest = {cat: (int(m), float(v)) for cat, (m, v) in manifest['latest'].items()}
+    return HistorySnapshot(categories, months, values, manifest['content_hash'], latest)
+
+
+def is_columnar(path):
+    return path.endswith(COLUMNAR_SUFFIX) or os.path.isdir(path)
+
+
+class InflationHistory:
+    # Loads the dataset once per process and reloads only when the file's
+    # mtime/size change. Readers grab a snapshot, so a reload never tears a read.
+    # The path may be the CSV or a columnar directory (see write_columnar).
+
+    def __init__(self, path=DATA_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._fingerprint = None
+
+    @property
+    def watch_path(self):
+        # The file whose mtime signals a new dataset version
+        if is_columnar(self.path):
+            return os.path.join(self.path, 'manifest.json')
+        return self.path
+
+    def exists(self):
+        return os.path.exists(self.watch_path)
+
+    def snapshot(self):
+        try:
+            st = os.stat(self.watch_path)
+        except OSError:
+            raise FileNotFoundError(self.path)
+        fingerprint = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            if self._snapshot is None or fingerprint != self._fingerprint:
+                loader = load_columnar if is_columnar(self.path) else load_csv
+                self._snapshot = loader(self.path)
+                self._fingerprint = fingerprint
+            return self._snapshot
+
+
+history = InflationHistory(os.getenv('INFLATION_HISTORY_PATH', DATA_PATH))
+
+
+def get_latest_rates():
+    if not history.exists():
+        return dict(FALLBACK_RATES) # Fallback
+
+    snap = history.snapshot()
+    latest_rates = {}
+    for cat in FALLBACK_RATES:
+        latest = snap.latest(cat)
+        # Convert 8.0 to 0.08
+        latest_rates[cat] = latest[1] / 100.0 if latest else FALLBACK_RATES[cat]
+    return latest_rates
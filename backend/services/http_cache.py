@@ -0,0 +1,53 @@
+import hashlib
+from functools import wraps
+from datetime import timezone
+
+from flask import request, make_response
+
+
+def make_etag(*parts):
+    # Opaque validator over what the response depends on (data version + the request's
+    # query string, so every slice/page/filter gets its own tag)
+    h = hashlib.sha256(request.full_path.encode('utf-8'))
+    for part in parts:
+        h.update(b'\0' + repr(part).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def utc(dt):
+    # DB timestamps are naive UTC
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def conditional(etag, build, last_modified=None, weak=False):
+    # Answers 304 from the validators alone, before build() serializes anything.
+    # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2).
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    else:
+        fresh = False
+
+    response = make_response('', 304) if fresh else make_response(build())
+    if response.status_code in (200, 304):
+        response.set_etag(etag, weak=weak)
+        if last_modified is not None:
+            response.last_modified = utc(last_modified)
+        # Caches may store it but must revalidate before reuse
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def etag_from(validators, weak=False):
+    # Route decorator: validators(**view_args) -> (tuple of version parts, last_modified or None).
+    # It should be a cheap indexed aggregate; the view only runs when the client's copy is stale.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts, last_modified = validators(*args, **kwargs)
+            return conditional(make_etag(*parts), lambda: view(*args, **kwargs), last_modified=last_modified, weak=weak)
+        return wrapper
+    return decorator
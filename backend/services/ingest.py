@@ -0,0 +1,175 @@
+import io
+import csv
+import json
+import time
+from datetime import datetime
+
+from models import db, User, UserFinancials, refresh_latest_financials
+
+CHUNK_ROWS = 5000
+MAX_ROWS = 500000
+# Per-row errors returned in the response; the count of failed rows is always exact
+MAX_REPORTED_ERRORS = 1000
+
+# Payload field -> column, same names as POST /api/data/spending
+NUMERIC_FIELDS = {
+    "salary": "salary",
+    "food": "food_spend",
+    "fuel": "fuel_spend",
+    "health": "health_spend",
+    "extra_spend": "extra_spend",
+    "total_spend": "total_spend",
+    "future_total_spend": "future_total_spend"
+}
+TEXT_FIELDS = {
+    "salary_status": ("salary_status", "Unknown", 20),
+    "most_affected_category": ("most_affected_category", "Stable", 50)
+}
+
+
+def read_records(stream, fmt):
+    # Yields (row number, dict) from an NDJSON or CSV byte stream without buffering the body.
+    # A line that is not valid JSON yields (row number, ValueError) instead.
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        for n, row in enumerate(csv.DictReader(text), start=1):
+            yield n, row
+        return
+
+    n = 0
+    for line in text:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield n, ValueError(f"invalid JSON: {e}")
+            continue
+        yield n, record if isinstance(record, dict) else ValueError("each line must be a JSON object")
+
+
+def validate_record(record, now):
+    # Returns the row for UserFinancials.__table__.insert(); raises ValueError naming the bad field
+    if isinstance(record, Exception):
+        raise record
+    try:
+        user_id = int(record.get('user_id'))
+    except (TypeError, ValueError):
+        raise ValueError("user_id must be an integer")
+
+    row = {"user_id": user_id}
+    for field, column in NUMERIC_FIELDS.items():
+        value = record.get(field)
+        try:
+            value = float(value) if value not in (None, '') else 0.0
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be a number")
+        if value < 0 or value != value:
+            raise ValueError(f"{field} must be >= 0")
+        row[column] = value
+
+    for field, (column, default, max_len) in TEXT_FIELDS.items():
+        value = record.get(field) or default
+        if not isinstance(value, str) or len(value) > max_len:
+            raise ValueError(f"{field} must be a string of at most {max_len} characters")
+        row[column] = value
+
+    curve = record.get('horizon_curve')
+    if isinstance(curve, str) and curve:
+        try:
+            curve = json.loads(curve) # CSV cells carry the curve as JSON text
+        except ValueError:
+            raise ValueError("horizon_curve must be JSON")
+    row["horizon_curve"] = json.dumps(curve) if curve else None
+
+    # Survey date, when the batch is historical; defaults to the import time
+    date = record.get('date')
+    if date:
+        try:
+            row["created_at"] = datetime.fromisoformat(str(date))
+        except ValueError:
+            raise ValueError("date must be ISO 8601 (YYYY-MM-DD[THH:MM:SS])")
+    else:
+        row["created_at"] = now
+    return row
+
+
+def ingest_spending(records):
+    # Validates and inserts (row number, record) pairs in CHUNK_ROWS transactions: one
+    # executemany per chunk plus one set-based refresh of the touched users' latest pointers.
+    # Invalid rows are reported and skipped; valid rows are committed chunk by chunk, so the
+    # summary always says exactly what was saved.
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    received = inserted = failed = 0
+    errors = []
+    chunk = []
+
+    def fail(n, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": n, "error": message})
+
+    def flush():
+        nonlocal inserted
+        if not chunk:
+            return
+        user_ids = {row["user_id"] for _, row in chunk}
+        known = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(user_ids))}
+        valid = []
+        for n, row in chunk:
+            if row["user_id"] in known:
+                valid.append((n, row))
+            else:
+                fail(n, f"unknown user_id {row['user_id']}")
+        if valid:
+            rows = [row for _, row in valid]
+            try:
+                db.session.execute(UserFinancials.__table__.insert(), rows)
+                refresh_latest_financials({row["user_id"] for row in rows})
+                db.session.commit()
+                inserted += len(rows)
+            except Exception as e:
+                db.session.rollback()
+                for n, _ in valid:
+                    fail(n, f"chunk rolled back: {e}")
+        chunk.clear()
+
+    # A body that stops decoding partway (bad UTF-8, broken CSV quoting) ends the import:
+    # rows read so far are still inserted and the summary says where reading stopped.
+    # Rows are read in buffered blocks, so the stop can come a few rows before the bad byte.
+    records = iter(records)
+    last = 0
+    while True:
+        try:
+            n, record = next(records)
+        except StopIteration:
+            break
+        except (UnicodeDecodeError, csv.Error) as e:
+            fail(last + 1, f"could not read body: {e}; this and later rows were not read")
+            break
+        last = n
+        if received == MAX_ROWS:
+            fail(n, f"row limit of {MAX_ROWS} reached; this and later rows were not read")
+            break
+        received += 1
+        try:
+            chunk.append((n, validate_record(record, now)))
+        except ValueError as e:
+            fail(n, str(e))
+        if len(chunk) >= CHUNK_ROWS:
+            flush()
+    flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": sorted(errors, key=lambda e: e["row"]),
+        "errors_truncated": failed > len(errors),
+        "elapsed_ms": elapsed * 1000,
+        "rows_per_second": inserted / elapsed if elapsed > 0 else None
+    }
@@ -0,0 +1,64 @@
+import json
+import uuid
+import dataclasses
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError: # optional: without it responses go through the stdlib encoder
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def _default(o):
+    # Same output as Flask's default provider (dates as HTTP dates, so existing clients
+    # parse the forecast's ds unchanged), plus NumPy/pandas values. orjson serializes
+    # NumPy itself; pandas Timestamps are datetime subclasses, which orjson rejects.
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, 'tolist'): # NumPy arrays/scalars on the stdlib path, pandas Index/Series
+        return o.tolist()
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj, sort_keys=False):
+    # obj -> compact UTF-8 JSON bytes. orjson writes NaN as null; the stdlib writes NaN as before.
+    if HAS_ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, separators=(',', ':')).encode('utf-8')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # app.json: jsonify() and request.get_json() go through orjson when it is installed,
+    # otherwise this is Flask's default provider. orjson responses are always compact.
+
+    def dumps(self, obj, **kwargs):
+        if HAS_ORJSON and not kwargs:
+            return dumps(obj, sort_keys=self.sort_keys).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if HAS_ORJSON and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not HAS_ORJSON:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
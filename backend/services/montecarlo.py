@@ -0,0 +1,157 @@
+import time
+import threading
+from statistics import NormalDist
+
+import numpy as np
+
+from services.history import to_epoch_month
+from services.projection import BUDGET_FIELDS
+
+DEFAULT_PATHS = 10000
+MAX_PATHS = 100000
+# Cap on budgets x paths per /simulate request, so one synchronous call stays well inside
+# a worker timeout: 200 budgets at DEFAULT_PATHS runs in ~1.3 s (2,000 x 10k took 5.8 s)
+MAX_BUDGET_PATHS = 2_000_000
+PERCENTILES = [5, 25, 50, 75, 95]
+# Forecast intervals are 80% wide (Prophet default, matched by the smoothing engine)
+INTERVAL_Z = NormalDist().inv_cdf(0.9)
+# Upper bound on budget x horizon x path cells evaluated per chunk (~32 MB of float64)
+CHUNK_CELLS = 4_000_000
+
+_stats_cache = {}
+_stats_lock = threading.Lock()
+
+
+def history_stats(snapshot, categories):
+    # Cross-category correlation of month-on-month rate changes and per-category
+    # AR(1) persistence of deviations from the mean, from the observed history.
+    # Cached per dataset version.
+    key = (snapshot.version, tuple(categories))
+    with _stats_lock:
+        if key in _stats_cache:
+            return _stats_cache[key]
+
+    rates = np.vstack([np.asarray(snapshot.range(cat)[1], dtype=float) for cat in categories])
+    changes = np.diff(rates, axis=1)
+    complete = ~np.isnan(changes).any(axis=0)
+    corr = np.corrcoef(changes[:, complete]) if complete.sum() > 2 else np.eye(len(categories))
+    corr = np.atleast_2d(np.nan_to_num(corr, nan=0.0))
+    np.fill_diagonal(corr, 1.0)
+
+    phi = np.zeros(len(categories))
+    for i in range(len(categories)):
+        dev = rates[i][~np.isnan(rates[i])]
+        dev = dev - dev.mean()
+        if len(dev) > 2 and dev.std() > 0:
+            phi[i] = np.corrcoef(dev[:-1], dev[1:])[0, 1]
+    phi = np.clip(np.nan_to_num(phi), 0.0, 0.95)
+
+    # Nudge to positive definite so the Cholesky factor exists
+    chol = np.linalg.cholesky(corr + 1e-9 * np.eye(len(categories)))
+    stats = {"corr": corr, "chol": chol, "phi": phi}
+    with _stats_lock:
+        if len(_stats_cache) >= 8:
+            _stats_cache.clear()
+        _stats_cache[key] = stats
+    return stats
+
+
+def forecast_bands(frames, categories, start_month, months):
+    # (months, categories) arrays of yhat and its standard deviation for the months
+    # after start_month, clamped to the forecast's edge outside its range
+    yhat = np.empty((months, len(categories)))
+    sigma = np.empty((months, len(categories)))
+    for c, cat in enumerate(categories):
+        frame = frames[cat]
+        first = to_epoch_month(frame['ds'].iloc[0].year, frame['ds'].iloc[0].month)
+        idx = np.clip(start_month - first + np.arange(months), 0, len(frame) - 1)
+        yhat[:, c] = frame['yhat'].to_numpy(dtype=float)[idx]
+        width = (frame['yhat_upper'] - frame['yhat_lower']).to_numpy(dtype=float)[idx]
+        sigma[:, c] = np.maximum(width, 0) / (2 * INTERVAL_Z)
+    return yhat, sigma
+
+
+def simulate_growth(yhat, sigma, stats, horizons, paths, rng):
+    # Draw `paths` correlated inflation paths and return the compounded price growth
+    # factor at each horizon: (horizon, path, category).
+    # Month t's rate is yhat_t + sigma_t * e_t, where e is a unit-variance AR(1) per
+    # category whose innovations are correlated across categories.
+    months, n_cat = yhat.shape
+    chol, phi = stats['chol'], stats['phi']
+    innovation_scale = np.sqrt(1 - phi ** 2)
+
+    log_level = np.zeros((paths, n_cat))
+    e = rng.standard_normal((paths, n_cat)) @ chol.T
+    wanted = {h: k for k, h in enumerate(horizons)}
+    growth = np.empty((len(horizons), paths, n_cat))
+    for t in range(months):
+        if t > 0:
+            e = phi * e + innovation_scale * (rng.standard_normal((paths, n_cat)) @ chol.T)
+        rate = np.maximum(yhat[t] + sigma[t] * e, -99.0)
+        log_level += np.log1p(rate / 100) / 12
+        if t + 1 in wanted:
+            growth[wanted[t + 1]] = np.exp(log_level)
+    return growth
+
+
+def simulate_budgets(frames, snapshot, spend, extra, salary, horizons, start_date, paths=DEFAULT_PATHS, seed=None):
+    # Savings distribution per (budget, horizon) under simulated inflation.
+    # All budgets share the same simulated paths (common random numbers), so
+    # differences between households reflect their budgets, not sampling noise.
+    started = time.perf_counter()
+    categories = list(BUDGET_FIELDS)
+    horizons = sorted(set(horizons))
+    stats = history_stats(snapshot, categories)
+    yhat, sigma = forecast_bands(frames, categories, to_epoch_month(start_date.year, start_date.month), max(horizons))
+    growth = simulate_growth(yhat, sigma, stats, horizons, paths, np.random.default_rng(seed))
+
+    n = len(spend)
+    p_deficit = np.empty((n, len(horizons)))
+    p_at_risk = np.empty((n, len(horizons)))
+    pct = np.empty((n, len(horizons), len(PERCENTILES)))
+    mean_total = np.empty((n, len(horizons)))
+
+    chunk = max(1, CHUNK_CELLS // (len(horizons) * paths))
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        # (budget, horizon, path)
+        total = np.einsum('bc,kpc->bkp', spend[lo:hi], growth) + extra[lo:hi, None, None]
+        savings = salary[lo:hi, None, None] - total
+        p_deficit[lo:hi] = (savings < 0).mean(axis=2)
+        p_at_risk[lo:hi] = (savings < 0.1 * salary[lo:hi, None, None]).mean(axis=2)
+        pct[lo:hi] = np.moveaxis(np.percentile(savings, PERCENTILES, axis=2), 0, -1)
+        mean_total[lo:hi] = total.mean(axis=2)
+
+    return {
+        "horizons": horizons,
+        "paths": paths,
+        "p_deficit": p_deficit,
+        "p_at_risk": p_at_risk,
+        "savings_percentiles": pct,
+        "mean_total_future": mean_total,
+        "correlation": stats['corr'],
+        "persistence": dict(zip(categories, stats['phi'].tolist())),
+        "elapsed_ms": (time.perf_counter() - started) * 1000
+    }
+
+
+def simulation_records(result):
+    horizons = result['horizons']
+    p_deficit = result['p_deficit'].tolist()
+    p_at_risk = result['p_at_risk'].tolist()
+    pct = result['savings_percentiles'].tolist()
+    mean_total = result['mean_total_future'].tolist()
+
+    records = []
+    for i in range(len(p_deficit)):
+        curve = []
+        for k, months in enumerate(horizons):
+            curve.append({
+                "months": months,
+                "p_deficit": p_deficit[i][k],
+                "p_at_risk": p_at_risk[i][k],
+                "mean_total_future": mean_total[i][k],
+                "savings_percentiles": {f"p{q}": v for q, v in zip(PERCENTILES, pct[i][k])}
+            })
+        records.append({"horizons": curve})
+    return records
@@ -0,0 +1,262 @@
+import threading
+from datetime import date
+from collections import OrderedDict
+
+import numpy as np
+
+# Budget payload field for each forecast category (same names as /api/data/spending)
+BUDGET_FIELDS = {"Food": "food", "Fuel": "fuel", "Healthcare": "health"}
+MAX_BUDGETS = 100000
+# Cap on budgets x horizons per /project request (a single "months" counts as one horizon).
+# It bounds the response body to ~10 MB of JSON before compression: 20,000 budgets at one
+# horizon, 3,333 with "all" (100k budgets were ~53 MB at one horizon).
+MAX_PROJECTION_CELLS = 20000
+# Horizons the calculator offers; evaluated together in one call
+SUPPORTED_HORIZONS = [1, 3, 6, 12, 24, 60]
+BANDS = ('yhat', 'yhat_lower', 'yhat_upper')
+
+
+def _epoch_month(d):
+    return d.year * 12 + (d.month - 1)
+
+
+def parse_budgets(data):
+    # Accepts one budget ({"food": .., "fuel": .., "health": .., "extra_spend": .., "salary": ..})
+    # or {"budgets": [budget, ...]}. Returns (spend[H, C], extra[H], salary[H]).
+    budgets = data.get('budgets')
+    if budgets is None:
+        budgets = [data]
+    if not isinstance(budgets, list) or not budgets:
+        raise ValueError("budgets must be a non-empty list")
+    if len(budgets) > MAX_BUDGETS:
+        raise ValueError(f"At most {MAX_BUDGETS} budgets per request")
+
+    fields = list(BUDGET_FIELDS.values()) + ['extra_spend', 'salary']
+    try:
+        table = np.array([[float(b.get(f) or 0) for f in fields] for b in budgets], dtype=float)
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("Each budget must be an object with numeric food/fuel/health/extra_spend/salary")
+    if (table < 0).any():
+        raise ValueError("Budget amounts must be >= 0")
+    n_cat = len(BUDGET_FIELDS)
+    return table[:, :n_cat], table[:, n_cat], table[:, n_cat + 1]
+
+
+def parse_start_date(value):
+    if not value:
+        return date.today()
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError("start_date must be YYYY-MM-DD")
+
+
+class CostIndex:
+    # Cumulative price index per (band, category) built from the monthly forecast path.
+    # Month t's annual rate r_t grows prices by (1 + r_t/100) ** (1/12) over that month;
+    # log_index[b, c, p] is the log of the compounded growth from the first month to p.
+    # Any (start, end) growth is then exp(log_index[end] - log_index[start]): O(1).
+
+    def __init__(self, frames, categories):
+        self.categories = categories
+        firsts = [_epoch_month(frames[c]['ds'].iloc[0]) for c in categories]
+        lasts = [_epoch_month(frames[c]['ds'].iloc[-1]) for c in categories]
+        self.first = min(firsts)
+        n = max(lasts) - self.first + 1
+
+        # Monthly log-growth on a shared month axis; a category shorter than the
+        # axis (e.g. reused after an incremental refit) is padded with its edge rate
+        log_growth = np.empty((len(BANDS), len(categories), n))
+        for c, cat in enumerate(categories):
+            lo = firsts[c] - self.first
+            for b, band in enumerate(BANDS):
+                rates = frames[cat][band].to_numpy(dtype=float)
+                g = np.log1p(rates / 100) / 12
+                log_growth[b, c, :lo] = g[0]
+                log_growth[b, c, lo:lo + len(g)] = g
+                log_growth[b, c, lo + len(g):] = g[-1]
+
+        self.log_growth = log_growth
+        self.log_index = np.concatenate([np.zeros((len(BANDS), len(categories), 1)), np.cumsum(log_growth, axis=2)], axis=2)
+        self.months = self.first + np.arange(n + 1)
+
+    def _log_at(self, month):
+        # Log index at the start of an epoch month, extrapolating with the edge rates outside the table
+        p = month - self.first
+        last = self.log_index.shape[2] - 1
+        if p < 0:
+            return self.log_index[:, :, 0] + p * self.log_growth[:, :, 0]
+        if p > last:
+            return self.log_index[:, :, last] + (p - last) * self.log_growth[:, :, -1]
+        return self.log_index[:, :, p]
+
+    def growth(self, start_month, end_month):
+        # Compounded growth factor per (band, category) between two epoch months
+        return np.exp(self._log_at(end_month) - self._log_at(start_month))
+
+    def path(self, start_month, months):
+        # Month-by-month growth factors (band, category, months + 1), starting at 1.0
+        base = self._log_at(start_month)
+        steps = np.stack([self._log_at(start_month + k) for k in range(months + 1)], axis=2)
+        return np.exp(steps - base[:, :, None])
+
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+def get_cost_index(frames, version):
+    # One index table per (dataset version, engine); rebuilt only when the forecast changes
+    with _index_lock:
+        if version in _index_cache:
+            _index_cache.move_to_end(version)
+            return _index_cache[version]
+    index = CostIndex(frames, list(BUDGET_FIELDS))
+    with _index_lock:
+        _index_cache[version] = index
+        while len(_index_cache) > 4:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def project_budgets(index, spend, extra, salary, months, start_date):
+    # Future monthly cost per (budget, category), compounding the forecast's monthly
+    # path from start_date to start_date + months. All budgets at once.
+    categories = index.categories
+    start = _epoch_month(start_date)
+    growth = index.growth(start, start + months) # (band, category)
+
+    future = spend * growth[0][None, :]
+    total_now = spend.sum(axis=1) + extra
+    total_future = future.sum(axis=1) + extra
+    savings_future = salary - total_future
+
+    status = _salary_status(savings_future, salary)
+    most_affected = _most_affected(future - spend, categories, axis=1)
+
+    return {
+        "categories": categories,
+        # Effective annualised rate over the window, comparable to the forecast's yhat
+        "rates": (growth[0] ** (12 / months) - 1) * 100,
+        "future": future,
+        "future_lower": spend * growth[1][None, :],
+        "future_upper": spend * growth[2][None, :],
+        "total_now": total_now,
+        "total_future": total_future,
+        "savings_now": salary - total_now,
+        "savings_future": savings_future,
+        "salary_status": status,
+        "most_affected": most_affected
+    }
+
+
+def _salary_status(savings, salary):
+    # Same thresholds as the calculator banner
+    return np.where(savings < 0, "DEFICIT", np.where(savings < 0.1 * salary, "AT RISK", "SURPLUS"))
+
+
+def _most_affected(increase, categories, axis):
+    top = np.array(categories)[increase.argmax(axis=axis)]
+    return np.where(increase.max(axis=axis) > 0, top, "None")
+
+
+def project_horizons(index, spend, extra, salary, horizons, start_date):
+    # Every (budget, category, horizon) in one broadcast: growth is (band, category, horizon)
+    categories = index.categories
+    start = _epoch_month(start_date)
+    growth = np.stack([index.growth(start, start + h) for h in horizons], axis=-1)
+
+    future = spend[:, :, None] * growth[0][None, :, :] # (budget, category, horizon)
+    total_now = spend.sum(axis=1) + extra
+    total_future = future.sum(axis=1) + extra[:, None]
+    savings_future = salary[:, None] - total_future
+    horizons_arr = np.asarray(horizons, dtype=float)
+
+    return {
+        "categories": categories,
+        "horizons": list(horizons),
+        "rates": (growth[0] ** (12 / horizons_arr)[None, :] - 1) * 100, # (category, horizon)
+        "future": future,
+        "total_now": total_now,
+        "total_future": total_future,
+        "savings_future": savings_future,
+        "salary_status": _salary_status(savings_future, salary[:, None]),
+        "most_affected": _most_affected(future - spend[:, :, None], categories, axis=1)
+    }
+
+
+def horizon_rates(projection):
+    # Annualised rate per category for each horizon, in projection['horizons'] order.
+    # The same for every budget, so it is returned once, not per row.
+    categories = projection['categories']
+    return [dict(zip(categories, r)) for r in projection['rates'].T.tolist()]
+
+
+def horizon_records(projection):
+    # One entry per budget, each carrying its whole horizon curve (rates: horizon_rates)
+    categories = projection['categories']
+    horizons = projection['horizons']
+    future = projection['future'].transpose(0, 2, 1).tolist() # (budget, horizon, category)
+    total_now = projection['total_now'].tolist()
+    total_future = projection['total_future'].tolist()
+    savings_future = projection['savings_future'].tolist()
+    status = projection['salary_status'].tolist()
+    most_affected = projection['most_affected'].tolist()
+
+    results = []
+    for i in range(len(total_now)):
+        curve = []
+        for k, months in enumerate(horizons):
+            curve.append({
+                "months": months,
+                "future": dict(zip(categories, future[i][k])),
+                "total_future": total_future[i][k],
+                "savings_future": savings_future[i][k],
+                "salary_status": status[i][k],
+                "most_affected": most_affected[i][k]
+            })
+        results.append({"total_now": total_now[i], "horizons": curve})
+    return results
+
+
+def trajectory(index, start_date, months):
+    # Monthly growth multipliers for charts: cost path = current cost * index
+    start = _epoch_month(start_date)
+    path = index.path(start, months)
+    dates = []
+    for m in range(start, start + months + 1):
+        dates.append(date(m // 12, m % 12 + 1, 1).isoformat())
+    result = {"dates": dates}
+    for c, cat in enumerate(index.categories):
+        result[cat] = {"index": path[0, c].tolist(), "lower": path[1, c].tolist(), "upper": path[2, c].tolist()}
+    return result
+
+
+def projection_rates(projection):
+    # {category: annualised rate} of a single-horizon projection
+    return dict(zip(projection['categories'], projection['rates'].tolist()))
+
+
+def to_records(projection, spend):
+    # Row-wise JSON for the results; one .tolist() per column instead of per-cell float().
+    # The rates are shared by every row: read them from projection_rates().
+    categories = projection['categories']
+    future = projection['future'].tolist()
+    future_lower = projection['future_lower'].tolist()
+    future_upper = projection['future_upper'].tolist()
+    current = spend.tolist()
+    columns = {k: projection[k].tolist() for k in
+               ('total_now', 'total_future', 'savings_now', 'savings_future', 'salary_status', 'most_affected')}
+
+    results = []
+    for i in range(len(future)):
+        row = {
+            "current": dict(zip(categories, current[i])),
+            "future": dict(zip(categories, future[i])),
+            "future_lower": dict(zip(categories, future_lower[i])),
+            "future_upper": dict(zip(categories, future_upper[i]))
+        }
+        for k, col in columns.items():
+            row[k] = col[i]
+        row["extra_cost"] = row["total_future"] - row["total_now"]
+        results.append(row)
+    return results
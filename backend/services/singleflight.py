@@ -0,0 +1,68 @@
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: thread-level coalescing only
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Coalesces concurrent calls for the same key onto one in-flight computation.
+    # Within a process, followers block on the leader's Event and share its result.
+    # With lock_dir set, leaders in different processes (gunicorn workers) also
+    # serialize on an flock, so the second one can pick up the first one's output.
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._file_lock(key):
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    @contextmanager
+    def _file_lock(self, key):
+        if self.lock_dir is None or fcntl is None:
+            yield
+            return
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32]
+        with open(os.path.join(self.lock_dir, f"{name}.lock"), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
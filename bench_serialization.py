@@ -0,0 +1,116 @@
+import os
+import sys
+import gzip
+import time
+import argparse
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# JSON routes served by the backend, largest payloads first
+ROUTES = [
+    "/api/data/users-insights",
+    "/api/inflation/forecast",
+    "/api/data/history/1",
+    "/api/data/insights-summary",
+    "/api/inflation/rates",
+    "/api/data/policy-makers",
+]
+
+
+def timed_provider(base):
+    # base provider class -> subclass recording seconds spent in response(), i.e. encoding
+    class Timed(base):
+        seconds = []
+
+        def response(self, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return super().response(*args, **kwargs)
+            finally:
+                self.seconds.append(time.perf_counter() - t0)
+    return Timed
+
+
+def encode_ms(app, client, provider, url, runs):
+    # Median encode time of the route's body under `provider`, uncompressed
+    app.json = provider(app)
+    provider.seconds.clear()
+    for _ in range(runs):
+        res = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert res.status_code == 200, (url, res.status_code)
+    return statistics.median(provider.seconds) * 1000, res.get_data()
+
+
+def wire_bytes(client, url, coding):
+    # Body size as sent for one Accept-Encoding, and the coding the backend chose
+    res = client.get(url, headers={"Accept-Encoding": coding})
+    assert res.headers.get("Content-Encoding") in (None, coding), res.headers
+    return len(res.get_data()), res.headers.get("Content-Encoding") or "identity"
+
+
+def document(app, body):
+    # Parsed body minus the forecast's status.age_seconds, which ticks between requests
+    doc = app.json.loads(body)
+    if isinstance(doc, dict) and isinstance(doc.get("status"), dict):
+        doc["status"].pop("age_seconds", None)
+    return doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON encode time and bytes on the wire per route")
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--per-user', type=int, default=3, help="Max submissions per user")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # Throwaway DB and forecast store: nothing is written under backend/, and every run
+    # fits the forecast fresh instead of reading an earlier run's cache
+    tmp = tempfile.mkdtemp(prefix='hiei-bench-')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+    os.environ['FORECAST_STORE_DIR'] = os.path.join(tmp, 'forecast_cache')
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(BACKEND_DIR)
+    from flask.json.provider import DefaultJSONProvider
+    from app import app
+    from models import db
+    from services import json_provider, compression
+    from bench_users_insights import seed
+
+    with app.app_context():
+        seed(db, args.users, args.per_user)
+    client = app.test_client()
+    client.get(ROUTES[1]) # fit the forecast once, outside the timings
+
+    flask_json = timed_provider(DefaultJSONProvider)
+    fast_json = timed_provider(json_provider.OrjsonProvider)
+    codings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    print(f"orjson: {'yes' if json_provider.HAS_ORJSON else 'NOT INSTALLED (stdlib fallback)'}  "
+          f"brotli: {'yes' if compression.brotli is not None else 'not installed'}  "
+          f"compression threshold: {compression.MIN_SIZE} B\n")
+
+    print(f"{'route':<30}{'flask (ms)':>12}{'orjson (ms)':>13}{'speedup':>9}{'identity':>11}"
+          + "".join(f"{c:>10}{c + ' ms':>10}" for c in codings))
+    for url in ROUTES:
+        before_ms, before_body = encode_ms(app, client, flask_json, url, args.runs)
+        after_ms, after_body = encode_ms(app, client, fast_json, url, args.runs)
+        # Same document either way (orjson is compact and drops the trailing newline)
+        assert document(app, before_body) == document(app, after_body), url
+
+        row = f"{url:<30}{before_ms:>12.2f}{after_ms:>13.2f}{before_ms / after_ms:>8.1f}x{len(after_body):>11}"
+        for coding in codings:
+            size, used = wire_bytes(client, url, coding)
+            # Compression time on its own (below the threshold nothing is compressed)
+            t0 = time.perf_counter()
+            if used == "gzip":
+                gzip.compress(after_body, compresslevel=compression.GZIP_LEVEL, mtime=0)
+            elif used == "br":
+                compression.brotli.compress(after_body, quality=compression.BROTLI_QUALITY)
+            row += f"{size:>10}{(time.perf_counter() - t0) * 1000:>10.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# Each scenario runs in a fresh interpreter, i.e. what one gunicorn worker pays
+SCENARIOS = {
+    "import app": "",
+    "first /api/auth request": "client.post('/api/auth/login/user', json={'username': '', 'password': ''})",
+    "first /api/inflation/rates": "client.get('/api/inflation/rates')",
+    "first /api/inflation/forecast": "client.get('/api/inflation/forecast')",
+}
+
+HEAVY_MODULES = ['pandas', 'numpy', 'prophet', 'cmdstanpy']
+
+PROBE = """
+import sys, time, json, resource
+t0 = time.perf_counter()
+from app import app
+t_import = time.perf_counter() - t0
+client = app.test_client()
+t1 = time.perf_counter()
+{action}
+t_action = time.perf_counter() - t1
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+print(json.dumps({{
+    "import_s": t_import,
+    "action_s": t_action,
+    "rss_mb": rss_mb(),
+    "loaded": [m for m in {heavy!r} if m in sys.modules]
+}}))
+"""
+
+
+def run_scenario(action):
+    code = PROBE.format(action=action or "pass", heavy=HEAVY_MODULES)
+    # Throwaway DB and forecast store per run: nothing is written under backend/, and
+    # the forecast scenario always measures a cold fit rather than a store hit
+    with tempfile.TemporaryDirectory(prefix='hiei-startup-') as tmp:
+        env = dict(os.environ,
+                   SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(tmp, 'startup.db'),
+                   FORECAST_STORE_DIR=os.path.join(tmp, 'forecast_cache'))
+        out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                             capture_output=True, text=True, check=True)
+    # app.py prints status lines on import; the probe's JSON is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend worker startup benchmark (import time + RSS)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--output', help="Append results as JSON lines to this file to track regressions")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<32}{'import (s)':>12}{'action (s)':>12}{'RSS (MB)':>10}  heavy modules loaded")
+    results = []
+    for name, action in SCENARIOS.items():
+        runs = [run_scenario(action) for _ in range(args.runs)]
+        best = min(runs, key=lambda r: r['import_s'])
+        row = {
+            "scenario": name,
+            "import_s": round(best['import_s'], 3),
+            "action_s": round(min(r['action_s'] for r in runs), 3),
+            "rss_mb": round(max(r['rss_mb'] for r in runs), 1),
+            "loaded": best['loaded']
+        }
+        results.append(row)
+        print(f"{name:<32}{row['import_s']:>12.3f}{row['action_s']:>12.3f}{row['rss_mb']:>10.1f}  {', '.join(row['loaded']) or '-'}")
+
+    if args.output:
+        stamp = datetime.now().isoformat(timespec='seconds')
+        with open(args.output, 'a') as f:
+            for row in results:
+                f.write(json.dumps(dict(row, timestamp=stamp)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+GROUPS = ["Urban Low", "Urban Middle", "Urban High", "Rural Low", "Rural Middle"]
+STATUSES = ["SURPLUS", "AT RISK", "DEFICIT"]
+CATEGORIES = ["Food", "Fuel", "Healthcare"]
+
+
+class QueryCounter:
+    # Counts statements sent to the database via SQLAlchemy's cursor event
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def seed(db, users, per_user):
+    from models import User, UserFinancials, backfill_latest_financials
+    rng = random.Random(42)
+    now = datetime(2026, 1, 1)
+
+    db.session.execute(User.__table__.insert(), [{
+        "id": i,
+        "username": f"user_{i}",
+        "phone": f"9{i:09d}",
+        "password_hash": "x",
+        "household_group": rng.choice(GROUPS)
+    } for i in range(1, users + 1)])
+
+    rows = []
+    for uid in range(1, users + 1):
+        # Some households never submit; the rest submit one or more times
+        for k in range(rng.randint(0, per_user)):
+            salary = rng.uniform(20000, 150000)
+            total = salary * rng.uniform(0.4, 1.2)
+            rows.append({
+                "user_id": uid,
+                "salary": salary,
+                "total_spend": total,
+                "future_total_spend": total * rng.uniform(1.0, 1.1),
+                "salary_status": rng.choice(STATUSES),
+                "most_affected_category": rng.choice(CATEGORIES),
+                "created_at": now + timedelta(days=k, minutes=rng.randint(0, 1000))
+            })
+    for lo in range(0, len(rows), 50000):
+        db.session.execute(UserFinancials.__table__.insert(), rows[lo:lo + 50000])
+    db.session.commit()
+    # Rows were inserted directly, bypassing save_spending: set the latest pointers
+    backfill_latest_financials()
+    return len(rows)
+
+
+def legacy_insights(users):
+    # The previous implementation: one query per user for the latest submission
+    from models import UserFinancials
+    result = []
+    for u in users:
+        latest = UserFinancials.query.filter_by(user_id=u.id).order_by(UserFinancials.created_at.desc()).first()
+        result.append((u.id, latest.salary_status if latest else None))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/api/data/users-insights latency and query count benchmark")
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--per-user', type=int, default=3, help="Max submissions per user")
+    parser.add_argument('--legacy-users', type=int, default=1000,
+                        help="Users to run the old per-user loop over (extrapolated to --users)")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='hiei-bench-'), 'bench.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    from app import app
+    from models import db, User
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        n_rows = seed(db, args.users, args.per_user)
+        print(f"Seeded {args.users} users / {n_rows} submissions in {time.perf_counter() - t0:.1f}s ({db_path})")
+        counter = QueryCounter(db.engine)
+
+        # Before: N+1, measured on a sample and extrapolated (the full run takes far too long)
+        sample = User.query.order_by(User.id).limit(args.legacy_users).all()
+        counter.count = 0
+        t0 = time.perf_counter()
+        legacy_insights(sample)
+        legacy_s = time.perf_counter() - t0
+        legacy_queries = counter.count
+        per_user = legacy_s / max(1, len(sample))
+        print(f"before: {len(sample)} users  {legacy_s * 1000:.0f} ms  {legacy_queries + 1} queries "
+              f"-> ~{per_user * args.users:.1f} s and {args.users + 1} queries for {args.users} users")
+
+    # After: the endpoint itself
+    client = app.test_client()
+    counter.count = 0
+    t0 = time.perf_counter()
+    res = client.get('/api/data/users-insights')
+    after_s = time.perf_counter() - t0
+    assert res.status_code == 200, res.get_data(as_text=True)
+    print(f"after:  {len(res.get_json())} users  {after_s * 1000:.0f} ms  {counter.count} queries (incl. JSON encoding)")
+
+
+if __name__ == "__main__":
+    main()
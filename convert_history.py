@@ -0,0 +1,22 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from services.history import load_csv, write_columnar, DATA_PATH, COLUMNAR_SUFFIX
+
+# CSV -> columnar (memory-mapped .npy per category) converter for the inflation history.
+# Point the backend at the result with INFLATION_HISTORY_PATH=<dest>.
+
+parser = argparse.ArgumentParser(description="Convert inflation_history.csv to the columnar format")
+parser.add_argument('src', nargs='?', default=DATA_PATH)
+parser.add_argument('dest', nargs='?', help=f"Defaults to <src without .csv>{COLUMNAR_SUFFIX}")
+args = parser.parse_args()
+
+src = os.path.abspath(args.src)
+dest = args.dest or os.path.splitext(src)[0] + COLUMNAR_SUFFIX
+
+snapshot = load_csv(src)
+manifest = write_columnar(snapshot, dest)
+print(f"Columnar history written to {dest}: {len(manifest['categories'])} categories x {manifest['n_months']} months")
@@ -1,7 +1,18 @@
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import os
+import time
+import logging
+import threading
+from collections import defaultdict, deque, OrderedDict
+
+try:
+    import msgpack
+except ImportError: # optional: columnar forecasts then come as JSON
+    msgpack = None
 
 
 # Smart API Status
@@ -17,27 +28,230 @@ else:
     except:
         API_URL = "https://hiei.onrender.com"
 
+logger = logging.getLogger(__name__)
 
+# (connect, read) seconds. Forecast/projection calls may wait on a model fit; the read
+# wait stays under gunicorn's 30 s worker timeout, past which the backend kills the worker.
+DEFAULT_TIMEOUT = (3.05, 20)
+SLOW_TIMEOUT = (3.05, 25)
+# Calls slower than this are logged with their route
+SLOW_CALL_SECONDS = 2.0
+LATENCY_WINDOW = 200
+# Process-wide response cache: every Streamlit session/rerun on this server shares it
+CACHE_MAX_ENTRIES = 64
+FORECAST_TTL = 300
+RATES_TTL = 300
+POLICY_MAKERS_TTL = 60
 
-def check_backend_status():
-    try:
-        r = requests.get(f"{API_URL}/")
-        return r.status_code == 200
-    except:
-        return False
 
-def login_user(username, password):
-    try:
-        r = requests.post(f"{API_URL}/api/auth/login", json={"username": username, "password": password})
-        if r.status_code == 200:
-            return r.json()
-        return None
-    except:
-        return None
+class ResponseCache:
+    # LRU of GET responses keyed by (route, params). Within its TTL an entry is served
+    # without a request; after that it is revalidated with If-None-Match, and a 304
+    # keeps the cached body (the backend's ETag follows its dataset version).
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (response, fetched_at)
+        self._lock = threading.Lock()
+        self.hits = self.revalidated = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, response):
+        with self._lock:
+            self._entries[key] = (response, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+
+class ApiClient:
+    # One per process: a keep-alive requests.Session shared by every Streamlit
+    # session/rerun, so calls reuse pooled TCP/TLS connections to the backend.
+    #
+    # Retries: connection failures are retried for every method (the request never
+    # reached the server); read errors and 502/503/504 only for GETs. POSTs, including
+    # the read-only /project and /simulate, are not replayed once sent: a timed-out
+    # computation would otherwise run again on an already overloaded backend.
+    #
+    # Every method returns the requests.Response, so views keep their status-code
+    # handling; connection errors/timeouts raise requests.RequestException as before.
+    # Forecast, rates and the policy-maker list come from the shared ResponseCache.
+
+    def __init__(self, base_url, retries=3, backoff=0.5, pool_size=20):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+        # allowed_methods limits the read and status retries; connect retries apply to all
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        self.session.mount(f"{self.base_url}/", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                                            max_retries=retry))
+
+        self._latency = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._lock = threading.Lock()
+        self.cache = ResponseCache()
+
+    def _request(self, route, method, path, timeout=DEFAULT_TIMEOUT, **kwargs):
+        start = time.perf_counter()
+        status = None
+        try:
+            res = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+            status = res.status_code
+            return res
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._latency[route].append((elapsed, status))
+            if elapsed > SLOW_CALL_SECONDS:
+                logger.warning("Slow API call %s %s: %.2fs (status %s)", method, route, elapsed, status)
+
+    def _cached_get(self, route, path, ttl, params=None, timeout=DEFAULT_TIMEOUT, headers=None):
+        # Only 200 responses are cached; errors always go back to the backend next time
+        headers = dict(headers or {})
+        key = (route, tuple(sorted((params or {}).items())), tuple(sorted(headers.items())))
+        entry = self.cache.get(key)
+        if entry is not None:
+            cached, fetched_at = entry
+            if time.monotonic() - fetched_at < ttl:
+                self.cache.count('hits')
+                return cached
+            if cached.headers.get('ETag'):
+                headers['If-None-Match'] = cached.headers['ETag']
+
+        res = self._request(route, "GET", path, timeout=timeout, params=params, headers=headers)
+        if res.status_code == 304 and entry is not None:
+            self.cache.count('revalidated')
+            self.cache.put(key, entry[0])
+            return entry[0]
+        self.cache.count('misses')
+        if res.status_code == 200:
+            self.cache.put(key, res)
+        return res
+
+    def latency_stats(self):
+        # Per route, over the last LATENCY_WINDOW calls: count, mean/p95/max ms, failures
+        stats = {}
+        with self._lock:
+            samples = {route: list(calls) for route, calls in self._latency.items()}
+        for route, calls in samples.items():
+            times = sorted(elapsed * 1000 for elapsed, _ in calls)
+            stats[route] = {
+                "calls": len(times),
+                "mean_ms": sum(times) / len(times),
+                "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+                "max_ms": times[-1],
+                "errors": sum(1 for _, status in calls if status is None or status >= 500)
+            }
+        return stats
+
+    # --- Health ---
+    def health(self) -> requests.Response:
+        return self._request("health", "GET", "/")
 
-def register_user(username, password, role):
+    # --- Auth ---
+    def login_user(self, username: str, password: str) -> requests.Response:
+        return self._request("login_user", "POST", "/api/auth/login/user", json={"username": username, "password": password})
+
+    def register_user(self, payload: dict) -> requests.Response:
+        return self._request("register_user", "POST", "/api/auth/register/user", json=payload)
+
+    def login_policy(self, username: str, password: str) -> requests.Response:
+        return self._request("login_policy", "POST", "/api/auth/login/policy", json={"username": username, "password": password})
+
+    def register_policy(self, payload: dict) -> requests.Response:
+        return self._request("register_policy", "POST", "/api/auth/register/policy", json=payload)
+
+    # --- Inflation ---
+    def get_forecast(self, months: int = 60, categories=None, history: int = None, engine: str = None,
+                     columnar: bool = False) -> requests.Response:
+        # columnar=True: one float32 array per band on an epoch-month axis (msgpack when
+        # installed, else JSON); read it with decode_columnar()
+        params = {"months": months}
+        headers = {}
+        if columnar:
+            params["format"] = "columnar"
+            if msgpack is not None:
+                headers["Accept"] = "application/x-msgpack"
+        if categories:
+            params["categories"] = ",".join(categories)
+        if history is not None:
+            params["history"] = history
+        if engine:
+            params["engine"] = engine
+        return self._cached_get("get_forecast", "/api/inflation/forecast", FORECAST_TTL, params=params,
+                                timeout=SLOW_TIMEOUT, headers=headers)
+
+    def get_rates(self) -> requests.Response:
+        return self._cached_get("get_rates", "/api/inflation/rates", RATES_TTL)
+
+    def project(self, payload: dict) -> requests.Response:
+        return self._request("project", "POST", "/api/inflation/project", timeout=SLOW_TIMEOUT, json=payload)
+
+    def simulate(self, payload: dict) -> requests.Response:
+        return self._request("simulate", "POST", "/api/inflation/simulate", timeout=SLOW_TIMEOUT, json=payload)
+
+    # --- Data ---
+    def save_spending(self, payload: dict) -> requests.Response:
+        return self._request("save_spending", "POST", "/api/data/spending", json=payload)
+
+    def save_spending_bulk(self, body, fmt: str = "ndjson") -> requests.Response:
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        return self._request("save_spending_bulk", "POST", "/api/data/spending/bulk", timeout=SLOW_TIMEOUT,
+                             data=body, headers={"Content-Type": content_type})
+
+    def get_policy_makers(self) -> requests.Response:
+        return self._cached_get("get_policy_makers", "/api/data/policy-makers", POLICY_MAKERS_TTL)
+
+    def get_history(self, user_id: int, **params) -> requests.Response:
+        # params: after, limit, status, most_affected_category, fields
+        return self._request("get_history", "GET", f"/api/data/history/{user_id}", params=params)
+
+    def request_callback(self, user_id: int, insurer_name: str) -> requests.Response:
+        return self._request("request_callback", "POST", "/api/data/callback", json={"user_id": user_id, "insurer_name": insurer_name})
+
+    def get_users_insights(self, **params) -> requests.Response:
+        # params: after, limit, status, household_group, most_affected_category, severity, fields
+        return self._request("get_users_insights", "GET", "/api/data/users-insights", params=params)
+
+    def get_insights_summary(self) -> requests.Response:
+        return self._request("get_insights_summary", "GET", "/api/data/insights-summary")
+
+
+api = ApiClient(API_URL)
+
+
+def decode_columnar(res):
+    # Body of a columnar forecast response as a dict, whichever encoding the backend chose
+    if res.headers.get("Content-Type", "").startswith("application/x-msgpack"):
+        return msgpack.unpackb(res.content)
+    return res.json()
+
+
+def check_backend_status():
     try:
-        r = requests.post(f"{API_URL}/api/auth/register", json={"username": username, "password": password, "role": role})
-        return r.status_code == 201, r.json()
-    except Exception as e:
-        return False, {"message": str(e)}
+        return api.health().status_code == 200
+    except requests.RequestException:
+        return False
@@ -1,10 +1,6 @@
 import streamlit as st
-import requests
 import os
-from utils.api import API_URL
-
-# Re-append /api/auth since the original variable included it
-AUTH_API_URL = f"{API_URL}/api/auth"
+from utils.api import api
 
 def load_local_css():
     css_path = os.path.join(os.path.dirname(__file__), '../assets/style.css')
@@ -36,7 +32,7 @@ def user_login():
         
         if st.button("Login to Dashboard", type="primary", use_container_width=True):
             try:
-                res = requests.post(f"{AUTH_API_URL}/login/user", json={"username": username, "password": password})
+                res = api.login_user(username, password)
                 if res.status_code == 200:
                     data = res.json()
                     st.session_state.user_token = data['token']
@@ -83,7 +79,7 @@ def user_register():
                     "address": address,
                     "household_group": household_group
                 }
-                res = requests.post(f"{AUTH_API_URL}/register/user", json=payload)
+                res = api.register_user(payload)
                 if res.status_code == 201:
                     st.success("Registration Successful! Please navigate to 'User Login' to continue.")
                 else:
@@ -115,7 +111,7 @@ def policy_login():
         
         if st.button("Login as Policy Maker", type="primary", use_container_width=True):
             try:
-                res = requests.post(f"{AUTH_API_URL}/login/policy", json={"username": username, "password": password})
+                res = api.login_policy(username, password)
                 if res.status_code == 200:
                     data = res.json()
                     st.session_state.pm_token = data['token']
@@ -151,7 +147,7 @@ def policy_register():
         if st.button("Register Account", type="primary", use_container_width=True):
             try:
                 payload = {"username": username, "password": password, "phone": phone, "policy_area": policy_area}
-                res = requests.post(f"{AUTH_API_URL}/register/policy", json=payload)
+                res = api.register_policy(payload)
                 if res.status_code == 201:
                     st.success("Registration Successful! Please Login.")
                 else:
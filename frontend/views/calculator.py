@@ -1,12 +1,10 @@
 import streamlit as st
 import pandas as pd
-import requests
 import plotly.express as px
 from datetime import datetime
 
-from utils.api import API_URL
+from utils.api import api
 
-API_BASE = f"{API_URL}/api"
 
 def display_calculator():
     # Load CSS
@@ -52,88 +50,75 @@ def display_calculator():
     
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("Calculate Impact", type="primary", use_container_width=True):
-        # Fetch Forecast Data
+        # Project on the backend for every slider horizon at once: moving the slider
+        # afterwards just picks another point from the cached curve, no new request
         try:
-            res = requests.get(f"{API_BASE}/inflation/forecast")
+            res = api.project({
+                "food": food_spend,
+                "fuel": fuel_spend,
+                "health": health_spend,
+                "extra_spend": extra_fixed,
+                "salary": salary,
+                "horizons": "all",
+                "start_date": start_date.isoformat(),
+                "trajectory": True
+            })
             if res.status_code != 200:
                 st.error("Failed to fetch inflation data")
                 return
-            forecasts = res.json()
+            payload = res.json()
+            projection = payload["results"][0]
+            # Rates are per horizon, shared by every budget: listed once in "horizons" order
+            rates = dict(zip(payload["horizons"], payload["rates"]))
+            path = payload["trajectory"]
+            
         except:
             st.error("Backend unreachable")
             return
-            
-        def calculate_future_cost(current_cost, category, months):
-            data = forecasts.get(category, [])
-            if not data: return current_cost, 0.0
-            
-            # Since forecasts are fixed from 2020 to 2029 (appx), we need to find relative index?
-            # Actually, the 'yhat' is Annual Inflation Rate.
-            # We will use the simplified approach:
-            # We assume the current_cost provided is valid for 'start_date'.
-            # We predict the cost 'months' later.
-            
-            # Find the rate at the future date
-            # We map the future date to the closest available data point index in our fixed forecast
-            # Future Date = start_date + months
-            future_date = start_date + pd.DateOffset(months=months)
-            
-            # Since we don't have the full dataframe here to do date matching easily, 
-            # we will pick the 'target_idx' simply by adding months to the base.
-            # However, for a real feel, let's just use the average rate of the category provided by forecast
-            # weighted by the months.
-            
-            # Better: Let's assume the user wants the projection based on the MODEL's prediction for that future time.
-            # We will grab the forecast value for (Today + Months).
-            
-            # Crude approximation for index: Data starts Jan 2020.
-            # Diff in months from Jan 2020 to Future Date.
-            start_project = pd.Timestamp("2020-01-01")
-            # Ensure future_date is a Timestamp
-            future_ts = pd.Timestamp(future_date)
-            
-            idx = (future_ts.year - start_project.year) * 12 + (future_ts.month - start_project.month)
-            
-            # Clamp index
-            idx = max(0, min(idx, len(data) - 1))
-            
-            predicted_rate_annual = data[idx]['yhat'] # The rate predicted for that specific future month
-            
-            # Formula: Future = Current * (1 + rate/100)^(months/12)
-            future = current_cost * ((1 + predicted_rate_annual/100) ** (months/12))
-            return future, predicted_rate_annual
 
-        f_food, r_food = calculate_future_cost(food_spend, "Food", period_months)
-        f_fuel, r_fuel = calculate_future_cost(fuel_spend, "Fuel", period_months)
-        f_health, r_health = calculate_future_cost(health_spend, "Healthcare", period_months)
-        
-        total_now = food_spend + fuel_spend + health_spend + extra_fixed
-        total_fut = f_food + f_fuel + f_health + extra_fixed
-        extra_cost = total_fut - total_now
+        # Risk view: savings distribution over simulated inflation paths (optional extra;
+        # a failure here leaves the projection on screen without the risk row)
+        risk = {}
+        try:
+            sim = api.simulate({
+                "food": food_spend,
+                "fuel": fuel_spend,
+                "health": health_spend,
+                "extra_spend": extra_fixed,
+                "salary": salary,
+                "start_date": start_date.isoformat()
+            })
+            if sim.status_code == 200:
+                risk = {point["months"]: point for point in sim.json()["results"][0]["horizons"]}
+        except Exception:
+            pass
         
-        savings_now = salary - total_now
-        savings_fut = salary - total_fut
+        # Month-by-month total spend (compounded forecast path, with interval band)
+        spend_path = pd.DataFrame({"Date": pd.to_datetime(path["dates"])})
+        for col, band in [("Projected", "index"), ("Low", "lower"), ("High", "upper")]:
+            spend_path[col] = extra_fixed + sum(
+                amount * pd.Series(path[cat][band])
+                for cat, amount in [("Food", food_spend), ("Fuel", fuel_spend), ("Healthcare", health_spend)]
+            )
         
         # Save to Session for Persistence
         st.session_state.calc_results = {
-            "period_months": period_months,
-            "r_food": r_food, "f_food": f_food,
-            "r_fuel": r_fuel, "f_fuel": f_fuel,
-            "r_health": r_health, "f_health": f_health,
-            "extra_cost": extra_cost,
-            "total_now": total_now,
-            "total_fut": total_fut,
-            "savings_fut": savings_fut,
+            "curve": {point["months"]: dict(point, rates=rates[point["months"]]) for point in projection["horizons"]},
+            "risk": risk,
             "salary": salary,
             "food_spend": food_spend,
             "fuel_spend": fuel_spend,
             "health_spend": health_spend,
-            "extra_fixed": extra_fixed
+            "extra_fixed": extra_fixed,
+            "spend_path": spend_path
         }
         
     # --- DISPLAY RESULTS FROM STATE ---
     if 'calc_results' in st.session_state:
-        res = st.session_state.calc_results
+        res = results_for_horizon(st.session_state.calc_results, period_months)
+        # Investment and User Dashboard read the flat fields (savings_fut, total_now, ...)
+        # straight from calc_results: keep them in step with the horizon on screen
+        st.session_state.calc_results.update({k: res[k] for k in HORIZON_FIELDS if k in res})
         
         # Display Dashboard
         st.markdown(f'<div class="section-header-calc">📊 Forecast Results ({res["period_months"]} Months)</div>', unsafe_allow_html=True)
@@ -170,6 +155,15 @@ def display_calculator():
                 <div>{banner_msg}</div>
             </div>
         """, unsafe_allow_html=True)
+        
+        # Monte Carlo risk for the selected horizon
+        risk = res.get('risk', {}).get(res['period_months'])
+        if risk:
+            pct = risk['savings_percentiles']
+            r1, r2, r3 = st.columns(3)
+            r1.metric("Chance of Deficit", f"{risk['p_deficit'] * 100:.0f}%")
+            r2.metric("Chance of Low Savings (<10%)", f"{risk['p_at_risk'] * 100:.0f}%")
+            r3.metric("Likely Savings Range (5–95%)", f"₹{int(pct['p5'])} – ₹{int(pct['p95'])}")
             
         # Visualize
         c_chart, c_details = st.columns([2, 1])
@@ -186,6 +180,14 @@ def display_calculator():
                          color_discrete_sequence=["#2dd4bf", "#f43f5e"]) # Teal vs Red
             fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font_color="#cbd5e1")
             st.plotly_chart(fig, use_container_width=True)
+            
+            if 'spend_path' in res:
+                st.markdown("##### Monthly Spending Path")
+                fig_path = px.line(res['spend_path'], x="Date", y=["Projected", "Low", "High"],
+                                   color_discrete_sequence=["#f43f5e", "#64748b", "#64748b"])
+                fig_path.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font_color="#cbd5e1",
+                                       yaxis_title="Monthly Spend (₹)", legend_title_text="")
+                st.plotly_chart(fig_path, use_container_width=True)
         
         with c_details:
              st.markdown("##### Quick Summary")
@@ -231,10 +233,11 @@ def display_calculator():
                         "total_spend": res['total_now'],
                         "future_total_spend": res['total_fut'],
                         "salary_status": salary_status,
-                        "most_affected_category": most_affected
+                        "most_affected_category": most_affected,
+                        "horizon_curve": res.get('horizon_curve')
                     }
                     try:
-                        s_res = requests.post(f"{API_BASE}/data/spending", json=payload)
+                        s_res = api.save_spending(payload)
                         if s_res.status_code == 201:
                             st.success("Data Saved!")
                             st.session_state.current_page = "User Dashboard"
@@ -243,3 +246,33 @@ def display_calculator():
                             st.error("Failed to save.")
                     except Exception as e:
                         st.error(f"Connection error: {e}")
+
+# Scalar fields results_for_horizon() derives for one horizon
+HORIZON_FIELDS = ('period_months', 'r_food', 'f_food', 'r_fuel', 'f_fuel', 'r_health', 'f_health',
+                  'total_now', 'total_fut', 'extra_cost', 'savings_fut')
+
+def results_for_horizon(calc, months):
+    # Flatten one horizon of the cached all-horizons curve into the fields the
+    # results section reads. Results saved before the curve existed pass through.
+    if 'curve' not in calc or months not in calc['curve']:
+        return calc
+    point = calc['curve'][months]
+    total_now = calc['food_spend'] + calc['fuel_spend'] + calc['health_spend'] + calc['extra_fixed']
+    return dict(
+        calc,
+        period_months=months,
+        r_food=point["rates"]["Food"], f_food=point["future"]["Food"],
+        r_fuel=point["rates"]["Fuel"], f_fuel=point["future"]["Fuel"],
+        r_health=point["rates"]["Healthcare"], f_health=point["future"]["Healthcare"],
+        total_now=total_now,
+        total_fut=point["total_future"],
+        extra_cost=point["total_future"] - total_now,
+        savings_fut=point["savings_future"],
+        spend_path=calc['spend_path'].iloc[:months + 1],
+        horizon_curve=[{
+            "months": p["months"],
+            "future_total_spend": p["total_future"],
+            "savings": p["savings_future"],
+            "salary_status": p["salary_status"]
+        } for p in calc['curve'].values()]
+    )
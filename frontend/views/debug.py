@@ -1,7 +1,6 @@
 import streamlit as st
-import requests
 
-from utils.api import API_URL
+from utils.api import API_URL, api
 
 API_BASE = f"{API_URL}/api"
 
@@ -18,9 +17,22 @@ def display_debug_panel():
         
         st.write("API Base:", API_BASE)
         
+        # Per-route latency of this process's backend calls (last 200 per route)
+        stats = api.latency_stats()
+        if stats:
+            st.write("API Latency (ms):")
+            st.dataframe(
+                [{"route": route, **{k: round(v) for k, v in s.items()}} for route, s in sorted(stats.items(), key=lambda kv: -kv[1]["p95_ms"])],
+                hide_index=True
+            )
+        
+        st.write("API Cache:", api.cache.stats())
+        if st.button("Clear API Cache"):
+            api.cache.clear()
+        
         if st.button("Check Backend Health"):
             try:
-                r = requests.get(f"{API_URL}/")
+                r = api.health()
                 st.success(f"Backend Status: {r.status_code}")
             except Exception as e:
                 st.error(f"Backend Error: {e}")
@@ -1,11 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import requests
 
-from utils.api import API_URL
+from utils.api import api, decode_columnar
 
-API_BASE = f"{API_URL}/api"
 
 def display_inflation_dashboard():
     # --- Professional Header ---
@@ -18,50 +16,44 @@ def display_inflation_dashboard():
         </div>
     """, unsafe_allow_html=True)
     
+    # --- 1. Interactive Controls ---
+    # Chosen before fetching so the backend only sends the selected window/categories
+    c_ctrl1, c_ctrl2 = st.columns([3, 1])
+    
+    with c_ctrl1:
+        # Category Toggle
+        available_cats = ["Food", "Fuel", "Healthcare"]
+        selected_cats = st.multiselect("Filter Categories", available_cats, default=available_cats)
+        
+    with c_ctrl2:
+        # Time Range Selector
+        time_range = st.selectbox("View Horizon", ["12 Months", "2 Years", "5 Years (All)"], index=2)
+    
+    horizon_months = {"12 Months": 12, "2 Years": 24, "5 Years (All)": 60}[time_range]
+    
     try:
-        res = requests.get(f"{API_BASE}/inflation/forecast")
+        res = api.get_forecast(months=horizon_months, categories=selected_cats or available_cats, columnar=True)
         if res.status_code == 200:
-            forecasts = res.json()
-            
-            # Combine into one DF
-            all_data = []
-            for cat, points in forecasts.items():
-                for p in points:
-                    all_data.append({
-                        "Date": p['ds'],
-                        "Inflation Rate (%)": p['yhat'],
-                        "Category": cat
-                    })
+            forecasts = decode_columnar(res)
             
-            df = pd.DataFrame(all_data)
-            df['Date'] = pd.to_datetime(df['Date'])
+            # Backend serves the last good forecast while it refits in the background
+            status = forecasts.get("status") or {}
+            if status.get("stale"):
+                st.caption(f"⏳ Forecast is being refreshed with the latest data (current model is {int(status.get('age_seconds', 0) // 3600)}h old).")
             
-            # --- 1. Interactive Controls ---
-            c_ctrl1, c_ctrl2 = st.columns([3, 1])
+            # Combine into one DF: columns arrive as arrays on a shared epoch-month axis
+            months = pd.Series(forecasts["ds"])
+            dates = pd.to_datetime({"year": months // 12, "month": months % 12 + 1, "day": 1})
+            df = pd.concat([
+                pd.DataFrame({"Date": dates, "Inflation Rate (%)": forecasts[cat]["yhat"], "Category": cat})
+                for cat in (selected_cats or available_cats) if cat in forecasts
+            ], ignore_index=True).dropna()
             
-            with c_ctrl1:
-                # Category Toggle
-                available_cats = sorted(df['Category'].unique().tolist())
-                selected_cats = st.multiselect("Filter Categories", available_cats, default=available_cats)
-                
-            with c_ctrl2:
-                # Time Range Selector
-                time_range = st.selectbox("View Horizon", ["12 Months", "2 Years", "5 Years (All)"], index=2)
-            
-            # --- Logic: Filter Data ---
+            # --- Logic: Filter Data (window + categories already applied by the backend) ---
             if not selected_cats:
                 st.warning("Please select at least one category to view trends.")
             else:
-                df_filtered = df[df['Category'].isin(selected_cats)]
-                
-                # Filter by Time Range (assuming forecast starts from min date)
-                start_date = df['Date'].min()
-                if time_range == "12 Months":
-                    end_date = start_date + pd.DateOffset(months=12)
-                    df_filtered = df_filtered[df_filtered['Date'] <= end_date]
-                elif time_range == "2 Years":
-                    end_date = start_date + pd.DateOffset(months=24)
-                    df_filtered = df_filtered[df_filtered['Date'] <= end_date]
+                df_filtered = df
                 
                 # --- 2. Interactive Chart ---
                 fig = px.line(df_filtered, x="Date", y="Inflation Rate (%)", color="Category",
@@ -1,9 +1,7 @@
 import streamlit as st
-import requests
 
-from utils.api import API_URL
+from utils.api import api
 
-API_BASE = f"{API_URL}/api"
 
 import random
 
@@ -301,8 +299,7 @@ def display_insurance_page():
                 if submitted:
                     if 'user_id' in st.session_state and st.session_state.user_id:
                         try:
-                            pl = {"user_id": st.session_state.user_id, "insurer_name": i_name}
-                            res = requests.post(f"{API_BASE}/data/callback", json=pl)
+                            res = api.request_callback(st.session_state.user_id, i_name)
                             if res.status_code == 201:
                                 st.success("Request sent successfully.")
                             else:
@@ -1,10 +1,29 @@
 import streamlit as st
 import pandas as pd
-import requests
 
-from utils.api import API_URL
+from utils.api import api
 
-API_BASE = f"{API_URL}/api"
+PAGE_SIZE = 2000
+CONTACT_PAGE_SIZE = 50
+# Household rows shown in the analysis table; the KPIs and group cards cover everyone
+TABLE_ROWS = 500
+
+def fetch_insights(params, max_rows=None):
+    # Walks /users-insights page by page (keyset cursor in X-Next-Cursor); None on failure
+    rows = []
+    after = None
+    while True:
+        limit = PAGE_SIZE if max_rows is None else min(PAGE_SIZE, max_rows - len(rows))
+        page_params = dict(params, limit=limit)
+        if after:
+            page_params["after"] = after
+        res = api.get_users_insights(**page_params)
+        if res.status_code != 200:
+            return None
+        rows.extend(res.json())
+        after = res.headers.get("X-Next-Cursor")
+        if not after or (max_rows is not None and len(rows) >= max_rows):
+            return rows
 
 def display_policy_dashboard():
     # 1️⃣ Dashboard Header
@@ -12,9 +31,10 @@ def display_policy_dashboard():
     st.markdown("Real-time economic impact monitoring & citizen welfare tracking.")
     
     try:
-        res = requests.get(f"{API_BASE}/data/users-insights")
+        # KPIs and group stats arrive pre-aggregated, so this page's cost does not grow with the population
+        res = api.get_insights_summary()
         if res.status_code == 200:
-            data = res.json()
+            summary = res.json()
             
             # --- HELPER: EMPTY STATE RENDERER ---
             def render_empty_dashboard_state():
@@ -62,11 +82,16 @@ def display_policy_dashboard():
                         st.markdown("**3. Contact Citizens**")
                         st.caption("Use the 'Contact Users' tab to reach out.")
             
-            if not data:
+            if not summary["households"]:
                 render_empty_dashboard_state()
                 return
 
             # --- PRE-PROCESSING ---
+            # First rows for the table; any severity filter limits it to households with a submission
+            data = fetch_insights({
+                "fields": "username,phone,household_group,salary,total_spend,future_total_spend,most_affected_category",
+                "severity": "Critical,Watchlist,Stable"
+            }, max_rows=TABLE_ROWS) or []
             insights = []
             for item in data:
                 fin = item.get('financials')
@@ -108,17 +133,13 @@ def display_policy_dashboard():
                 return
 
             # --- 1️⃣ EXECUTIVE SUMMARY (KPI Cards) ---
-            total_h = len(df)
-            critical_h = len(df[df['Status'] == 'Critical'])
-            stable_h = len(df[df['Status'] == 'Stable'])
+            total_h = summary["households"]
+            critical_h = summary["severity_counts"]["Critical"]
+            stable_h = summary["severity_counts"]["Stable"]
             
             # Most affected cat
-            if not df['Most Affected'].empty:
-                top_issue = df['Most Affected'].mode()[0]
-                affected_pct = int((len(df[df['Most Affected'] == top_issue]) / total_h) * 100)
-            else:
-                top_issue = "None"
-                affected_pct = 0
+            top_issue = summary["most_affected"]["category"]
+            affected_pct = int(summary["most_affected"]["share"] * 100)
 
             st.markdown("### 📢 Executive Summary")
             k1, k2, k3, k4 = st.columns(4)
@@ -161,18 +182,21 @@ def display_policy_dashboard():
                 use_container_width=True,
                 hide_index=True
             )
+            if total_h > len(df):
+                st.caption(f"Showing the first {len(df)} of {total_h} households. Use 'Contact Users' to filter the full list.")
             
             st.divider()
             
             # --- 3️⃣ GROUP-WISE IMPACT ANALYSIS ---
             st.subheader("🏙️ Group-Wise Impact Analysis")
             
-            # Group by and aggregation
-            grp_df = df.groupby("Group").agg({
-                "Monthly Income": "mean",
-                "Inflation Impact": "mean",
-                "_severity": "mean"
-            }).reset_index()
+            # Per-group means computed server-side over every household
+            grp_df = pd.DataFrame(summary["groups"]).rename(columns={
+                "household_group": "Group",
+                "avg_income": "Monthly Income",
+                "avg_impact": "Inflation Impact",
+                "avg_severity": "_severity"
+            })
             
             grp_df["Avg Risk Level"] = grp_df["_severity"].apply(lambda x: "High" if x > 2.5 else "Medium" if x > 1.5 else "Low")
             
@@ -213,7 +237,8 @@ def display_policy_dashboard():
                 st.caption("Take immediate action on filtered data.")
                 
                 with st.expander("✉️ Contact High-Risk Households"):
-                    st.dataframe(df[df['Status'] == 'Critical'][['Name', 'Phone']], hide_index=True)
+                    critical = fetch_insights({"severity": "Critical", "fields": "username,phone"}, max_rows=TABLE_ROWS) or []
+                    st.dataframe(pd.DataFrame([{"Name": u["username"], "Phone": u["phone"]} for u in critical], columns=["Name", "Phone"]), hide_index=True)
                 
                 c1, c2 = st.columns(2)
                 c1.button("🚩 Flag for Review", use_container_width=True)
@@ -226,8 +251,31 @@ def display_policy_dashboard():
 
 def display_contact_users():
     st.header("Contact Citizens")
+    
+    # Server-side filters; results are paged with the keyset cursor
+    f1, f2, f3 = st.columns(3)
+    status = f1.multiselect("Salary Status", ["DEFICIT", "AT RISK", "SURPLUS"])
+    group = f2.text_input("Household Group")
+    affected = f3.multiselect("Most Affected", ["Food", "Fuel", "Healthcare"])
+    params = {"limit": CONTACT_PAGE_SIZE, "fields": "username,phone,household_group,most_affected_category"}
+    if status:
+        params["status"] = ",".join(status)
+    if group:
+        params["household_group"] = group
+    if affected:
+        params["most_affected_category"] = ",".join(affected)
+    
+    # Reset to the first page whenever the filters change
+    filter_key = repr(sorted(params.items()))
+    if st.session_state.get("contact_filters") != filter_key:
+        st.session_state.contact_filters = filter_key
+        st.session_state.contact_cursors = [None]
+    cursors = st.session_state.contact_cursors
+    if cursors[-1]:
+        params["after"] = cursors[-1]
+    
     try:
-        res = requests.get(f"{API_BASE}/data/users-insights")
+        res = api.get_users_insights(**params)
         if res.status_code == 200:
             data = res.json()
             for user in data:
@@ -240,5 +288,17 @@ def display_contact_users():
                     st.write(f"**Phone:** {user['phone']}")
                     st.write(f"**Address:** {user.get('address', 'Not Provided')}")
                     st.markdown(f"[📞 Call Now](tel:{user['phone']})")
+            
+            p1, p2, p3 = st.columns([1, 2, 1])
+            p2.caption(f"Page {len(cursors)}")
+            if len(cursors) > 1 and p1.button("⬅️ Previous"):
+                cursors.pop()
+                st.rerun()
+            next_cursor = res.headers.get("X-Next-Cursor")
+            if next_cursor and p3.button("Next ➡️"):
+                cursors.append(next_cursor)
+                st.rerun()
+        else:
+            st.error("Failed to fetch users.")
     except Exception as e:
         st.error(f"Error: {e}")
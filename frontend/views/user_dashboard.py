@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
-import requests
 
-from utils.api import API_URL
+from utils.api import api
 
-API_BASE = f"{API_URL}/api"
 
 def display_user_dashboard():
     # --- Custom CSS for FinTech Look ---
@@ -130,7 +128,7 @@ def display_user_dashboard():
     
     try:
         user_id = st.session_state.user_id
-        res = requests.get(f"{API_BASE}/data/history/{user_id}")
+        res = api.get_history(user_id)
         if res.status_code == 200:
             history_data = res.json()
             history_count = len(history_data)
@@ -338,7 +336,7 @@ def display_policy_makers_list():
     st.markdown("Below is the list of registered Policy Makers you can reach out to.")
     
     try:
-        res = requests.get(f"{API_BASE}/data/policy-makers")
+        res = api.get_policy_makers()
         if res.status_code == 200:
             pms = res.json()
             if pms:
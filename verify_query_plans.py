@@ -0,0 +1,120 @@
+import os
+import re
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+# Hot routes, exercised through the Flask test client. Every statement they send is
+# captured and run through EXPLAIN QUERY PLAN.
+ROUTES = [
+    ("GET", "/api/data/history/2", None),
+    ("GET", "/api/data/history/2?limit=2", None),
+    ("GET", "/api/data/history/2?limit=2&after={history_cursor}", None),
+    ("GET", "/api/data/history/2?status=DEFICIT&fields=date,salary_status", None),
+    ("GET", "/api/data/users-insights", None),
+    ("GET", "/api/data/users-insights?limit=10&after=5", None),
+    ("GET", "/api/data/users-insights?severity=Critical&fields=username,phone", None),
+    ("GET", "/api/data/insights-summary", None),
+    ("GET", "/api/data/policy-makers", None),
+    ("POST", "/api/data/spending", {"user_id": 3, "salary": 50000, "food": 8000, "fuel": 3000, "health": 2000}),
+    ("POST", "/api/data/callback", {"user_id": 3, "insurer_name": "LIC"}),
+]
+
+# Tables a route may legitimately walk end to end: the users listing/aggregates are
+# driven by users itself, and policymakers is a small directory returned whole.
+SCAN_ALLOWED = {"users", "policymakers"}
+
+SCAN = re.compile(r"\bSCAN (?!CONSTANT ROW)(\w+)")
+
+
+def seed(db):
+    from models import User, UserFinancials, PolicyMaker, backfill_latest_financials
+    from datetime import datetime, timedelta
+
+    db.session.add(PolicyMaker(username="pm", password_hash="x", policy_area="Food"))
+    for uid in range(1, 21):
+        db.session.add(User(id=uid, username=f"user_{uid}", password_hash="x", household_group="Urban Middle"))
+        for k in range(uid % 4):
+            db.session.add(UserFinancials(
+                user_id=uid, salary=40000, total_spend=30000 + 1000 * k, future_total_spend=36000 + 1000 * k,
+                salary_status="SURPLUS" if k else "DEFICIT", most_affected_category="Food",
+                created_at=datetime(2026, 1, 1) + timedelta(days=k)
+            ))
+    db.session.commit()
+    backfill_latest_financials()
+
+
+def plan_problems(conn, statement, parameters):
+    # Plan lines that walk a whole table outside SCAN_ALLOWED ("SEARCH ... USING INDEX" is fine)
+    if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+        return [], []
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    plan = [row[-1] for row in rows]
+    problems = []
+    for detail in plan:
+        m = SCAN.search(detail)
+        if m and m.group(1) not in SCAN_ALLOWED:
+            problems.append(detail)
+    return plan, problems
+
+
+def main():
+    db_path = os.path.join(tempfile.mkdtemp(prefix='hiei-plans-'), 'plans.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    from sqlalchemy import event
+    from app import app
+    from models import db
+
+    with app.app_context():
+        seed(db)
+        engine = db.engine
+        history_cursor = db.session.execute(db.text(
+            "SELECT id FROM user_financials WHERE user_id = 2 ORDER BY created_at DESC, id DESC LIMIT 1"
+        )).scalar()
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    client = app.test_client()
+    failures = 0
+    for method, url, body in ROUTES:
+        url = url.format(history_cursor=history_cursor)
+        captured.clear()
+        res = client.open(url, method=method, json=body)
+        statements = list(captured)
+        if res.status_code >= 400:
+            print(f"FAIL {method} {url}: HTTP {res.status_code}")
+            failures += 1
+            continue
+
+        route_ok = True
+        event.remove(engine, 'before_cursor_execute', capture)
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan, problems = plan_problems(conn, statement, parameters)
+                if problems:
+                    failures += 1
+                    route_ok = False
+                    print(f"FAIL {method} {url}")
+                    print("     " + " ".join(statement.split()))
+                    for detail in plan:
+                        print(f"       {'!!' if detail in problems else '  '} {detail}")
+        event.listen(engine, 'before_cursor_execute', capture)
+        if route_ok:
+            print(f"ok   {method} {url} ({len(statements)} statements)")
+
+    if failures:
+        print(f"\n{failures} full-scan regression(s)")
+        sys.exit(1)
+    print("\nNo full scans on hot routes.")
+
+
+if __name__ == "__main__":
+    main()